@@ -0,0 +1,261 @@
+# asr_backends.py
+# Pluggable speech-recognition backends with hedged requests
+import collections
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import speech_recognition as sr
+
+
+class BackendStats:
+    """Rolling latency and outcome counters for one backend."""
+
+    def __init__(self, window=100):
+        self.latencies = collections.deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, success):
+        with self._lock:
+            if success:
+                self.successes += 1
+                self.latencies.append(latency)
+            else:
+                self.failures += 1
+
+    def percentile(self, q):
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        total = self.successes + self.failures
+        return {
+            "requests": total,
+            "success_rate": round(self.successes / total, 3) if total else None,
+            "wins": self.wins,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+class RecognizerBackend:
+    """
+    Base class for a speech-to-text engine.
+
+    Subclasses implement recognize(), returning the transcript or raising
+    sr.UnknownValueError when nothing intelligible was heard. Any other
+    exception counts as a backend failure. preferred_rate is the sample
+    rate audio should be converted to before upload, None for any.
+    """
+
+    name = "backend"
+    preferred_rate = None
+
+    def __init__(self):
+        self.stats = BackendStats()
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """The free Google Web Speech API, via speech_recognition."""
+
+    name = "google"
+    # Higher rates cost upload time without helping the recognizer
+    preferred_rate = 16000
+
+    def __init__(self, recognizer, language="en-US"):
+        super().__init__()
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+
+class FakeBackend(RecognizerBackend):
+    """
+    Offline stand-in with scripted latency and failures, for testing hedging.
+
+    Args:
+        transcript (str or callable): Text to return, or audio -> text
+        latency (float): Mean response time in seconds
+        jitter (float): Uniform +/- variation applied to latency
+        failure_rate (float): Probability of raising sr.UnknownValueError
+        name (str): Name reported in stats
+        seed (int or None): Seed for reproducible runs
+        upload_bytes_per_second (float or None): Also wait for the FLAC
+            upload Google would need at this uplink speed
+    """
+
+    def __init__(self, transcript, latency=0.2, jitter=0.0, failure_rate=0.0, name="fake", seed=None,
+                 upload_bytes_per_second=None):
+        super().__init__()
+        self.transcript = transcript
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.name = name
+        self.upload_bytes_per_second = upload_bytes_per_second
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def recognize(self, audio):
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.failure_rate
+        if self.upload_bytes_per_second:
+            # Encoded the way recognize_google does it
+            upload = audio.get_flac_data(convert_rate=None if audio.sample_rate >= 8000 else 8000, convert_width=2)
+            delay += len(upload) / self.upload_bytes_per_second
+        time.sleep(delay)
+        if fail:
+            raise sr.UnknownValueError()
+        return self.transcript(audio) if callable(self.transcript) else self.transcript
+
+
+class HedgedRecognizer:
+    """
+    Recognizes with the first backend, hedging with a second request if it is slow.
+
+    The primary request gets a deadline equal to the primary backend's p95
+    latency (clamped to [min_deadline, max_deadline], and initial_deadline
+    until enough samples exist). If it has not answered by then, a hedge
+    request goes to the next backend, or to the same backend again when
+    only one is configured. A request that errors triggers the next one
+    immediately. sr.UnknownValueError is a definite answer, not a failure:
+    that backend is not asked again, and the utterance only goes to a
+    backend that has not been asked yet, so a miss on a single backend
+    costs one call. The first successful transcript wins and the rest are
+    abandoned. At most max_requests requests are made per utterance.
+
+    Args:
+        backends (list of RecognizerBackend): In order of preference
+        quantile (float): Latency quantile used as the hedging deadline
+        initial_deadline (float): Deadline before any latency is known
+        min_deadline (float): Lower bound on the deadline
+        max_deadline (float): Upper bound on the deadline
+        max_requests (int): Cap on primary plus hedge requests
+        min_samples (int): Latencies needed before the quantile is trusted
+    """
+
+    def __init__(self, backends, quantile=0.95, initial_deadline=1.5, min_deadline=0.3,
+                 max_deadline=3.0, max_requests=3, min_samples=10):
+        if not backends:
+            raise ValueError("At least one recognizer backend is required")
+        self.backends = list(backends)
+        self.quantile = quantile
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.max_requests = max_requests
+        self.min_samples = min_samples
+        self.hedges = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_requests * 2, thread_name_prefix="asr-hedge")
+
+    def deadline(self, backend):
+        if len(backend.stats.latencies) < self.min_samples:
+            return self.initial_deadline
+        p = backend.stats.percentile(self.quantile)
+        return min(self.max_deadline, max(self.min_deadline, p))
+
+    def _call(self, backend, audio):
+        start = time.perf_counter()
+        try:
+            text = backend.recognize(audio)
+        except Exception:
+            backend.stats.record(time.perf_counter() - start, False)
+            raise
+        backend.stats.record(time.perf_counter() - start, True)
+        return backend, text
+
+    def recognize(self, audio, cancelled=None):
+        """
+        Args:
+            audio (sr.AudioData): The utterance
+            cancelled (callable or None): Returns True to abandon early
+
+        Returns:
+            str: The first successful transcript
+
+        Raises:
+            sr.UnknownValueError: If no backend heard any speech
+            sr.RequestError: If the last failure was a request error
+        """
+        pending = {}
+        tried = []
+        heard_nothing = set()
+
+        def launch(backend):
+            pending[self._pool.submit(self._call, backend, audio)] = backend
+            tried.append(backend)
+            return backend
+
+        def next_backend():
+            backend = self.backends[min(len(tried), len(self.backends) - 1)]
+            if backend not in heard_nothing:
+                return backend
+            # Asking again would get the same answer; only a backend not yet asked might differ
+            return next((b for b in self.backends if b not in tried), None)
+
+        current = launch(self.backends[0])
+        last_error = None
+        while pending:
+            if cancelled is not None and cancelled():
+                break
+            can_hedge = len(tried) < self.max_requests
+            timeout = self.deadline(current) if can_hedge else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    _, text = future.result()
+                except sr.UnknownValueError:
+                    heard_nothing.add(backend)
+                    continue
+                except Exception as e:
+                    last_error = e
+                    continue
+                if text:
+                    backend.stats.wins += 1
+                    return text
+                heard_nothing.add(backend)
+            # Hedges to a backend that has already heard nothing are abandoned
+            for future in [f for f, backend in pending.items() if backend in heard_nothing]:
+                del pending[future]
+            if not can_hedge or (done and pending):
+                continue
+            backend = next_backend()
+            if backend is None:
+                continue
+            if not done:
+                # Slow: hedge with the next backend instead of waiting it out
+                self.hedges += 1
+            current = launch(backend)
+        if isinstance(last_error, sr.RequestError) and not heard_nothing:
+            raise last_error
+        raise sr.UnknownValueError()
+
+    def shutdown(self):
+        """Stop the request threads; requests already running are left to finish."""
+        self._pool.shutdown(wait=False)
+
+    @property
+    def preferred_rate(self):
+        return self.backends[0].preferred_rate
+
+    def summary(self):
+        return {
+            "hedges": self.hedges,
+            "backends": {backend.name: backend.stats.summary() for backend in self.backends},
+        }
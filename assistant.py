@@ -0,0 +1,534 @@
+# assistant.py
+# The voice pipeline behind the window: capture, recognition, routing, LLM, speech
+#
+# Importing this module pulls in the OpenAI, ElevenLabs and speech
+# recognition SDKs, so main.py loads it on a background thread after the
+# window is up.
+import os
+import threading
+import time
+
+import speech_recognition as sr
+from dotenv import load_dotenv
+from elevenlabs.client import ElevenLabs
+from elevenlabs.environment import ElevenLabsEnvironment
+from openai import OpenAI
+
+from asr_backends import GoogleBackend, HedgedRecognizer
+from audio_prep import AudioPreprocessor
+from audio_player import StreamingAudioPlayer
+from barge_in import BargeInMonitor, InterruptionStats
+from easter_eggs import all_responses
+from http_pool import ELEVENLABS_BASE_URL, OPENAI_BASE_URL, get_shared_pool
+from intents import IntentContext, default_router
+from mic_stream import BufferedMicrophone
+from response_cache import ResponseCache
+from speculation import Speculator
+from speech_pipeline import SpeechPipeline, split_sentences
+from tracing import NULL_TRACE, Tracer
+from tts_cache import AudioCache
+from turn_scheduler import TurnScheduler
+from vad import Endpointer, VoiceActivityDetector
+
+GREETING = "Initializing Aria system. Ready for input."
+FAREWELL = "Shutting down. Goodbye."
+CACHE_DIR = os.getenv("ARIA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "aria"))
+
+
+class SimpleVoiceAssistant:
+    """
+    One conversation: capture, recognition, routing, LLM and speech.
+
+    Args:
+        signal_emitter: SignalEmitter, or anything with the same signals
+        response_cache (ResponseCache or None): Pass one to share it between sessions
+        audio_cache (AudioCache or None): Pass one to share it between sessions
+        player (StreamingAudioPlayer or None): Where speech goes, the local
+            speaker by default
+    """
+
+    def __init__(self, signal_emitter, response_cache=None, audio_cache=None, player=None):
+        self.signal_emitter = signal_emitter
+        load_dotenv()
+        
+        # Both SDKs share one keep-alive pool so handshakes happen outside the turn
+        self.http_pool = get_shared_pool()
+        self.client = OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            base_url=self.http_pool.register(OPENAI_BASE_URL),
+            http_client=self.http_pool.client,
+        )
+        self.eleven = ElevenLabs(
+            api_key=os.getenv('ELEVENLABS_API_KEY'),
+            # base_url= would force https; an explicit environment also allows local http stand-ins
+            environment=ElevenLabsEnvironment(
+                base=self.http_pool.register(ELEVENLABS_BASE_URL),
+                wss=ELEVENLABS_BASE_URL.replace("http", "ws", 1),
+            ),
+            httpx_client=self.http_pool.client,
+        )
+        
+        self.recognizer = sr.Recognizer()
+        self.recognizer.dynamic_energy_threshold = True
+        self.recognizer.energy_threshold = 300
+        self.recognizer.pause_threshold = 0.8
+        self.recognizer.phrase_threshold = 0.3
+        self.recognizer.non_speaking_duration = 0.5
+        
+        # Later backends are only asked when earlier ones are slow or fail
+        self.asr = HedgedRecognizer([GoogleBackend(self.recognizer)])
+        # Utterances are trimmed and resampled before upload, and encoded once
+        # for all the requests made for them; None uploads captures as-is
+        self.audio_prep = AudioPreprocessor(target_rate=self.asr.preferred_rate)
+        
+        # VAD endpointing ends a turn as soon as the silence is convincing;
+        # set to None to fall back to pause_threshold above
+        self.endpointer = Endpointer(VoiceActivityDetector())
+        
+        # Speculative mode: at a pause, recognize what has been said so far and
+        # start the reply before the endpointer is sure the turn is over. It
+        # costs a recognition per pause plus the tokens of every wrong guess,
+        # so it is opt-in per deployment with ARIA_SPECULATE=1
+        self.speculative = os.getenv("ARIA_SPECULATE", "0") == "1"
+        self.speculator = Speculator(
+            self._recognize_partial,
+            self.stream_gpt_response,
+            should_speculate=self._routes_to_llm,
+        )
+        
+        # Time, arithmetic, units, timers, "repeat that" and the easter eggs are
+        # answered locally; anything the router is not confident about goes to GPT
+        self.intents = default_router()
+        self.last_reply = None
+        self._timers = []
+        
+        # A shared cache is saved by whoever shared it
+        self._owns_response_cache = response_cache is None
+        self.response_cache = response_cache if response_cache is not None else ResponseCache(
+            max_entries=512,
+            max_bytes=1024 * 1024,
+            ttl=24 * 3600,
+            path=os.path.join(CACHE_DIR, "responses.json"),
+        )
+        # Set while nothing is being spoken; the capture loop waits on it
+        self.quiet = threading.Event()
+        self.quiet.set()
+        self.listening = threading.Event()
+        self.stop_listening = threading.Event()
+        self._speak_lock = threading.Lock()
+        
+        # capture -> ASR -> route -> LLM -> TTS -> playback, one live turn at a time
+        # Per-turn stage timings, appended to ARIA_TRACE_FILE when it is set
+        self.tracer = Tracer(os.getenv("ARIA_TRACE_FILE"))
+        self.scheduler = TurnScheduler(self.recognize, self.respond, tracer=self.tracer)
+        
+        self.microphone = None  # Opened once for the session by open_devices()
+        self.make_microphone = BufferedMicrophone
+        self.player = player if player is not None else StreamingAudioPlayer(sample_rate=22050)
+        
+        # Barge-in: talking over Aria stops playback and cancels the reply
+        self.interruptions = InterruptionStats()
+        self.barge_in = BargeInMonitor(self.recognizer, self.player, self._on_barge_in)
+        self._pipeline = None
+        self._resume_index = None
+        
+        # Speak GPT replies sentence by sentence while they are still generating
+        self.streaming = True
+        
+        # Voice settings
+        self.voice_settings = {
+            "voice": "Glinda",
+            "model": "eleven_monolingual_v1",
+            # Raw PCM can be played straight from memory as it streams in
+            "output_format": "pcm_22050",
+            "voice_settings": {
+                "stability": 0.95,
+                "similarity_boost": 0.75,
+                "style": 0.0,
+                "use_speaker_boost": True,
+            }
+        }
+        
+        # generate() lists every voice to resolve a name, so look it up once
+        self._voice_ids = {}
+        
+        # Canned phrases are synthesized once and replayed from disk
+        self.audio_cache = audio_cache if audio_cache is not None else AudioCache(os.path.join(CACHE_DIR, "tts"))
+        self.prewarm_audio_cache = True
+
+    def open_devices(self):
+        """Open the speaker stream and the microphone now rather than on the first turn."""
+        self.player.open()
+        if self.microphone is None:
+            self.microphone = self.make_microphone(self.recognizer)
+            self.microphone.listeners.append(self.barge_in.feed)
+
+    def warm_up(self):
+        """Open API connections and fill the audio cache in the background."""
+        self.http_pool.preconnect()
+        self.http_pool.start_keepalive()
+        self.voice_id()
+        if self.prewarm_audio_cache:
+            self.audio_cache.prewarm(
+                # Loaded phrase tables can be huge; only the built-in replies are paid for up front
+                [GREETING, FAREWELL] + all_responses(builtin_only=True),
+                self.voice_settings,
+                self._generate_audio,
+            )
+
+    def stop(self):
+        """End run(): stop listening, cancel the turn in progress and release the microphone."""
+        self.stop_listening.set()
+        self.scheduler.shutdown()
+        pipeline = self._pipeline
+        if pipeline is not None:
+            pipeline.cancel()
+        if self.microphone is not None:
+            self.microphone.stop()
+        for timer in list(self._timers):
+            timer.cancel()
+
+    def stream_gpt_response(self, text, turn=None):
+        trace = turn.trace if turn is not None else NULL_TRACE
+        while True:
+            cached, in_flight = self.response_cache.claim(text)
+            if cached is not None:
+                trace.annotate(llm_cache="hit")
+                trace.mark("llm_first_token")
+                trace.mark("llm_last_token")
+                yield cached
+                return
+            if in_flight is None:
+                break  # This turn is the leader and makes the request
+            # An identical request is already running; share its completion
+            trace.annotate(llm_cache="coalesced")
+            try:
+                result = self._wait_for_flight(in_flight, turn)
+            except Exception as e:
+                print(f"Error: {e}")
+                yield "System error. Unable to process request."
+                return
+            if turn is not None and turn.is_cancelled:
+                return
+            if result is not None:
+                trace.mark("llm_first_token")
+                trace.mark("llm_last_token")
+                yield result
+                return
+            # The leader's turn was cancelled before it finished; claim again
+
+        full_response = ""
+        stream = None
+        try:
+            stream = self.client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are Aria, a concise AI assistant. Always respond in 1-2 sentences maximum, even for complex questions. Never use lists or bullet points."},
+                    {"role": "user", "content": text}
+                ],
+                stream=True,
+                max_tokens=100  # Limit response length
+            )
+            for chunk in stream:
+                if turn is not None and turn.is_cancelled:
+                    return
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    trace.mark("llm_first_token")
+                    full_response += delta
+                    yield delta
+            
+            trace.mark("llm_last_token")
+            self.response_cache.resolve(text, full_response)
+        
+        except Exception as e:
+            print(f"Error: {e}")
+            self.response_cache.fail(text, e)
+            if not full_response:
+                yield "System error. Unable to process request."
+        
+        finally:
+            if stream is not None:
+                stream.close()
+            # Stream cancelled or closed early by the consumer: hand the request to a waiter
+            self.response_cache.release(text)
+
+    @staticmethod
+    def _wait_for_flight(flight, turn, poll_seconds=0.1):
+        # Returns None if the leader gave up or this turn was cancelled while waiting
+        while True:
+            try:
+                return flight.result(timeout=poll_seconds)
+            except TimeoutError:
+                if turn is not None and turn.is_cancelled:
+                    return None
+
+    def get_gpt_response(self, text, turn=None):
+        self.signal_emitter.thinking_signal.emit(True)
+        return "".join(self.stream_gpt_response(text, turn))
+
+    def voice_id(self):
+        """The ElevenLabs ID of the configured voice, fetched on first use."""
+        voice = self.voice_settings["voice"]
+        if voice not in self._voice_ids:
+            try:
+                voices = self.eleven.voices.get_all(show_legacy=True).voices
+            except Exception as e:
+                print(f"Voice lookup error: {e}")
+                return voice  # Let generate() try the name itself
+            # A name that matches nothing may already be an ID
+            self._voice_ids[voice] = next((v.voice_id for v in voices if v.name == voice), voice)
+        return self._voice_ids[voice]
+
+    def _generate_audio(self, text):
+        return self.eleven.generate(text=text, **dict(self.voice_settings, voice=self.voice_id()))
+
+    def synthesize(self, text):
+        return self.audio_cache.stream(text, self.voice_settings, self._generate_audio)
+
+    def play_audio(self, chunks, trace=NULL_TRACE):
+        stats = self.player.play(chunks)
+        if stats.first_sample_at is not None:
+            trace.mark("playback_start", at=stats.first_sample_at)
+        return stats
+
+    @property
+    def is_speaking(self):
+        return not self.quiet.is_set()
+
+    def speak(self, text):
+        threading.Thread(target=self.speak_stream, args=([text],), daemon=True).start()
+
+    def speak_stream(self, fragments, turn=None):
+        with self._speak_lock:
+            self.quiet.clear()
+            self.listening.clear()
+            self.signal_emitter.thinking_signal.emit(True)
+            self.signal_emitter.listening_signal.emit(False)
+            
+            trace = turn.trace if turn is not None else NULL_TRACE
+            pipeline = SpeechPipeline(
+                self.synthesize,
+                lambda chunks: self.play_audio(chunks, trace),
+                stop=self.player.stop,
+            )
+            pipeline.on_first_byte = lambda: trace.mark("tts_first_byte")
+            
+            def on_first_audio():
+                self.signal_emitter.thinking_signal.emit(False)
+                self.barge_in.arm()
+            
+            pipeline.on_first_audio = on_first_audio
+            self._pipeline = pipeline
+            pipeline.start()
+            if turn is not None:
+                turn.on_cancel(pipeline.cancel)
+            try:
+                for segment in split_sentences(self._show_as_typed(fragments)):
+                    if pipeline.cancelled.is_set():
+                        break
+                    pipeline.submit(segment)
+            except Exception as e:
+                print(f"Speaking error: {e}")
+            finally:
+                # The text is complete here even though playback may still be running
+                if pipeline.segments:
+                    self.last_reply = " ".join(pipeline.segments)
+                    self.signal_emitter.response_ready_signal.emit(self.last_reply)
+                pipeline.finish()
+                trace.mark("playback_end")
+                self.barge_in.disarm()
+                self._pipeline = None
+                if pipeline.cancelled.is_set():
+                    discarded = max(0, pipeline.synthesized_bytes - pipeline.played_bytes)
+                    self.interruptions.record_discard(
+                        discarded,
+                        discarded / (self.player.sample_rate * self.player.frame_bytes),
+                        len(pipeline.unspoken_text),
+                    )
+                self.signal_emitter.thinking_signal.emit(False)
+                self.quiet.set()
+                self.signal_emitter.listening_signal.emit(True)
+
+    def _show_as_typed(self, fragments):
+        # The transcript batches these per frame, so emitting per token is cheap
+        for fragment in fragments:
+            self.signal_emitter.response_delta_signal.emit(fragment)
+            yield fragment
+
+    def _on_barge_in(self, chunk_index, started_at):
+        # Runs on the microphone capture thread, so it must not block
+        self._resume_index = chunk_index
+        pipeline = self._pipeline
+        if pipeline is not None:
+            pipeline.cancel()
+        self.scheduler.cancel_all()
+        stop_latency = time.perf_counter() + self.player.block_seconds - started_at
+        self.interruptions.record_barge_in(stop_latency)
+        print(f"Barge-in: playback stopped {stop_latency * 1000:.0f} ms after speech onset")
+
+    def _prepare_audio(self, audio):
+        return self.audio_prep.prepare(audio) if self.audio_prep is not None else audio
+
+    def recognize(self, turn):
+        audio = self._prepare_audio(turn.audio)
+        turn.trace.annotate(asr_bytes=len(audio.frame_data))
+        try:
+            text = self.asr.recognize(audio, cancelled=lambda: turn.is_cancelled).lower()
+        except sr.UnknownValueError:
+            print("Could not understand audio after multiple attempts")
+            self.speculator.discard(turn.audio)
+            return None
+        except sr.RequestError as e:
+            print(f"Speech recognition error: {e}")
+            return None
+        
+        turn.trace.mark("asr_result")
+        self.signal_emitter.transcribe_signal.emit(text)
+        return text
+
+    def respond(self, turn):
+        text = turn.text
+        self.signal_emitter.update_text_signal.emit(text, True)
+        
+        if text == "exit":
+            turn.trace.mark("route_decision")
+            turn.trace.annotate(route="exit")
+            self.speak_stream([FAREWELL], turn)
+            self.stop_listening.set()
+            return
+        
+        # Answer locally when an intent is confident, before paying for GPT
+        intent = self.intents.route(text, IntentContext(last_reply=self.last_reply, start_timer=self.start_timer))
+        turn.trace.mark("route_decision")
+        if intent is not None:
+            turn.trace.annotate(route="intent", intent=intent.name)
+            self.speak_stream([intent.response], turn)
+            return
+            
+        # Nothing local could answer, get GPT response
+        turn.trace.annotate(route="llm")
+        reply = self.speculator.take(text, turn) if self.speculative else None
+        if reply is not None:
+            turn.trace.annotate(speculation="hit")
+            reply = self._traced_reply(reply, turn.trace)
+        if self.streaming:
+            self.signal_emitter.thinking_signal.emit(True)
+            self.speak_stream(reply or self.stream_gpt_response(text, turn), turn)
+        else:
+            if reply is not None:
+                self.signal_emitter.thinking_signal.emit(True)
+                response = "".join(reply)
+            else:
+                response = self.get_gpt_response(text, turn)
+            if not turn.is_cancelled:
+                self.speak_stream([response], turn)
+
+    def _traced_reply(self, reply, trace):
+        for fragment in reply:
+            trace.mark("llm_first_token")
+            yield fragment
+        trace.mark("llm_last_token")
+
+    def _routes_to_llm(self, text):
+        text = text.lower()
+        return text != "exit" and self.intents.match(text) is None
+
+    def start_timer(self, seconds, label):
+        """Announce when a timer set by voice runs out."""
+        def done():
+            self._timers.remove(timer)
+            if not self.stop_listening.is_set():
+                self.speak(f"Your {label} timer is done.")
+        
+        timer = threading.Timer(seconds, done)
+        timer.daemon = True
+        self._timers.append(timer)
+        timer.start()
+
+    def _recognize_partial(self, audio):
+        try:
+            return self.asr.recognize(self._prepare_audio(audio)).lower()
+        except (sr.UnknownValueError, sr.RequestError):
+            return None
+
+    def run(self):
+        self.signal_emitter.listening_signal.emit(True)
+        self.stop_listening.clear()
+        self.speak_stream([GREETING])
+        
+        self.open_devices()
+        with self.microphone as source:
+            # Chunk range [start, end) of the utterance submitted last
+            submitted = None
+            while not self.stop_listening.is_set():
+                try:
+                    # Woken by the end of playback rather than polled
+                    self.quiet.wait()
+                    if self.stop_listening.is_set():
+                        break
+                    if source.failed:
+                        print("Microphone unavailable; no longer listening")
+                        self.signal_emitter.listening_signal.emit(False)
+                        break
+                    
+                    resume_index, self._resume_index = self._resume_index, None
+                    if resume_index is not None and submitted is not None and \
+                            submitted[0] <= resume_index < submitted[1]:
+                        # Capture was already running when the user barged in, and the
+                        # utterance it submitted holds the onset; hearing it again would
+                        # send the same speech to ASR twice
+                        resume_index = None
+                    submitted = None
+                    if resume_index is not None:
+                        # Barge-in: start the new turn from where the user began talking
+                        source.seek(resume_index, pre_roll_seconds=0.25)
+                    else:
+                        # Skip our own voice but keep a little pre-roll for an early start
+                        source.flush(keep_seconds=0.25)
+                    
+                    self.listening.set()
+                    self.signal_emitter.listening_signal.emit(True)
+                    
+                    try:
+                        start = source.position
+                        if self.endpointer is not None:
+                            audio = source.listen(
+                                self.endpointer,
+                                timeout=10,
+                                phrase_time_limit=10,
+                                on_pause=self.speculator.speculate if self.speculative else None,
+                            )
+                            speech_ended_at = source.speech_ended_at
+                        else:
+                            audio = self.recognizer.listen(
+                                source,
+                                timeout=10,
+                                phrase_time_limit=10
+                            )
+                            # listen() returns once pause_threshold of silence has passed
+                            speech_ended_at = time.perf_counter() - self.recognizer.pause_threshold
+                        
+                        # Playback began while we were capturing: this is our own voice
+                        if self.is_speaking:
+                            continue
+                        
+                        if self.speculative:
+                            self.speculator.attach(audio)
+                        self.scheduler.submit(audio, speech_ended_at=speech_ended_at)
+                        submitted = (start, source.position)
+                    
+                    except sr.WaitTimeoutError:
+                        pass
+                    finally:
+                        self.listening.clear()
+                
+                except Exception as e:
+                    print(f"Listening error: {e}")
+                    self.listening.clear()
+                    self.stop_listening.wait(0.1)
+        
+        self.scheduler.idle.wait()
+        if self._owns_response_cache:
+            # Writes are batched; don't lose the last few replies on exit
+            self.response_cache.save()
@@ -0,0 +1,225 @@
+# audio_player.py
+# In-memory streaming playback of raw PCM chunks through PyAudio
+import audioop
+import threading
+import time
+
+
+class RingBuffer:
+    """
+    Fixed-capacity byte ring buffer shared by one writer and one reader.
+
+    write() blocks while the buffer is full, which throttles the producer to
+    real-time once the buffer has filled. read() never blocks, since it is
+    called from the audio callback.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._read_pos = 0
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return self._size
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def write(self, data):
+        view = memoryview(data)
+        while len(view):
+            with self._cond:
+                while self._size == self.capacity and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                n = min(len(view), self.capacity - self._size)
+                start = (self._read_pos + self._size) % self.capacity
+                first = min(n, self.capacity - start)
+                self._data[start:start + first] = view[:first]
+                self._data[:n - first] = view[first:n]
+                self._size += n
+                self._cond.notify_all()
+            view = view[n:]
+
+    def read(self, n, align=1):
+        with self._cond:
+            n = min(n, self._size)
+            n -= n % align
+            first = min(n, self.capacity - self._read_pos)
+            out = bytes(self._data[self._read_pos:self._read_pos + first])
+            out += bytes(self._data[:n - first])
+            self._read_pos = (self._read_pos + n) % self.capacity
+            self._size -= n
+            self._cond.notify_all()
+            return out
+
+    def wait_empty(self, timeout=None):
+        with self._cond:
+            return self._cond.wait_for(lambda: self._size == 0 or self._closed, timeout)
+
+    def clear(self):
+        with self._cond:
+            self._read_pos = 0
+            self._size = 0
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._closed = False
+            self._read_pos = 0
+            self._size = 0
+
+
+class PlaybackStats:
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.first_sample_at = None
+        self.finished_at = None
+        self.bytes_played = 0
+
+    @property
+    def first_sample_latency(self):
+        """Seconds from play() being called to the first sample reaching the device."""
+        if self.first_sample_at is None:
+            return None
+        return self.first_sample_at - self.started_at
+
+
+class StreamingAudioPlayer:
+    """
+    Plays PCM audio from memory as it arrives, without temp files or subprocesses.
+
+    A single output stream is opened lazily and kept open for the lifetime of
+    the player. The PortAudio callback drains a bounded ring buffer and
+    substitutes silence whenever the buffer runs dry, so play() can start
+    feeding chunks the moment the first one arrives from the TTS API.
+
+    Args:
+        sample_rate (int): Sample rate of the incoming PCM, e.g. 22050
+        channels (int): Number of interleaved channels
+        sample_width (int): Bytes per sample (2 for 16-bit PCM)
+        buffer_seconds (float): Ring buffer capacity in seconds of audio
+        frames_per_buffer (int): PortAudio callback block size
+    """
+
+    def __init__(self, sample_rate=22050, channels=1, sample_width=2,
+                 buffer_seconds=2.0, frames_per_buffer=512):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_bytes = channels * sample_width
+        self.frames_per_buffer = frames_per_buffer
+        capacity = int(sample_rate * buffer_seconds) * self.frame_bytes
+        self._ring = RingBuffer(capacity)
+        self._pa = None
+        self._continue = None
+        self._stream = None
+        self._stats = None
+        # RMS of the most recent block sent to the device, for echo-aware barge-in
+        self.output_level = 0
+        self._play_lock = threading.Lock()
+        self._open_lock = threading.Lock()
+
+    def open(self):
+        with self._open_lock:
+            if self._stream is not None:
+                return
+            # Imported here so headless users of this module need no PortAudio
+            import pyaudio
+            self._pa = pyaudio.PyAudio()
+            self._continue = pyaudio.paContinue
+            self._stream = self._pa.open(
+                format=self._pa.get_format_from_width(self.sample_width),
+                channels=self.channels,
+                rate=self.sample_rate,
+                output=True,
+                frames_per_buffer=self.frames_per_buffer,
+                stream_callback=self._callback,
+            )
+            self._stream.start_stream()
+
+    def close(self):
+        with self._open_lock:
+            self._ring.close()
+            if self._stream is not None:
+                self._stream.stop_stream()
+                self._stream.close()
+                self._stream = None
+            if self._pa is not None:
+                self._pa.terminate()
+                self._pa = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        wanted = frame_count * self.frame_bytes
+        data = self._ring.read(wanted, align=self.frame_bytes)
+        stats = self._stats
+        if data and stats is not None:
+            if stats.first_sample_at is None:
+                stats.first_sample_at = time.perf_counter()
+            stats.bytes_played += len(data)
+        self.output_level = audioop.rms(data, self.sample_width) if data else 0
+        if len(data) < wanted:
+            data += b"\x00" * (wanted - len(data))
+        return data, self._continue
+
+    def play(self, chunks):
+        """
+        Play an iterable of PCM byte chunks, blocking until it has been heard.
+
+        Args:
+            chunks (iterable of bytes): Audio in the player's format
+
+        Returns:
+            PlaybackStats: Timing of the first sample and bytes played
+        """
+        self.open()
+        with self._play_lock:
+            self._ring.reopen()
+            self._stats = stats = PlaybackStats(time.perf_counter())
+            carry = b""
+            for chunk in chunks:
+                if self._ring.closed:
+                    break
+                chunk = carry + chunk
+                # Keep whole frames only; a chunk boundary may split a sample
+                cut = len(chunk) - len(chunk) % self.frame_bytes
+                carry = chunk[cut:]
+                self._ring.write(chunk[:cut])
+            self._ring.wait_empty()
+            # Let the last callback block reach the device before returning
+            time.sleep(self.block_seconds)
+            stats.finished_at = time.perf_counter()
+            self._stats = None
+            return stats
+
+    @property
+    def block_seconds(self):
+        """Audio already handed to the device can lag a stop() by up to one block."""
+        return self.frames_per_buffer / self.sample_rate
+
+    @property
+    def buffered_bytes(self):
+        return len(self._ring)
+
+    def stop(self):
+        """
+        Discard any buffered audio and unblock a play() in progress.
+
+        Returns:
+            int: Bytes of audio that were buffered and will never be heard
+        """
+        self._ring.close()
+        dropped = len(self._ring)
+        self._ring.clear()
+        return dropped
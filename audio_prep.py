@@ -0,0 +1,221 @@
+# audio_prep.py
+# Shrink captured utterances before they are uploaded for recognition
+import threading
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from vad import pcm_to_float
+
+
+class PrepStats:
+    """What preprocessing saved: upload bytes, FLAC encodes avoided and the time it took."""
+
+    def __init__(self):
+        self.utterances = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds_in = 0.0
+        self.seconds_out = 0.0
+        self.prep_seconds = 0.0
+        self.encodes = 0
+        self.reuses = 0
+        self.encoded_bytes = 0
+        self._lock = threading.Lock()
+
+    def record_prep(self, audio_in, audio_out, elapsed, channels=1):
+        with self._lock:
+            self.utterances += 1
+            self.bytes_in += len(audio_in.frame_data)
+            self.bytes_out += len(audio_out.frame_data)
+            self.seconds_in += duration(audio_in) / channels
+            self.seconds_out += duration(audio_out)
+            self.prep_seconds += elapsed
+
+    def record_encode(self, size):
+        with self._lock:
+            self.encodes += 1
+            self.encoded_bytes += size
+
+    def record_reuse(self):
+        with self._lock:
+            self.reuses += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                "utterances": self.utterances,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "saved_pct": round(100 * (1 - self.bytes_out / self.bytes_in), 1) if self.bytes_in else None,
+                "trimmed_s": round(self.seconds_in - self.seconds_out, 2),
+                "mean_prep_ms": round(self.prep_seconds / self.utterances * 1000, 2) if self.utterances else None,
+                "flac_encodes": self.encodes,
+                "flac_reuses": self.reuses,
+                "flac_bytes": self.encoded_bytes,
+            }
+
+
+def duration(audio):
+    return len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+
+class PreparedAudio(sr.AudioData):
+    """
+    AudioData that encodes each upload format once.
+
+    speech_recognition re-encodes (FLAC runs an external encoder) on every
+    recognize_* call, so every retry, hedge and backend would pay for it
+    again. Here each (format, rate, width) result is computed by the first
+    caller and reused by the rest; concurrent callers wait for it rather
+    than encoding in parallel.
+
+    source is the capture this was prepared from.
+    """
+
+    def __init__(self, frame_data, sample_rate, sample_width, source=None, stats=None):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.source = source
+        self.stats = stats
+        self._encoded = {}
+        # get_flac_data calls get_wav_data, so the lock must be re-entrant
+        self._lock = threading.RLock()
+
+    def _encode_once(self, key, encode):
+        with self._lock:
+            # Only FLAC, the upload format, is counted; WAV is its intermediate
+            counted = self.stats is not None and key[0] == "flac"
+            if key in self._encoded:
+                if counted:
+                    self.stats.record_reuse()
+                return self._encoded[key]
+            data = self._encoded[key] = encode()
+            if counted:
+                self.stats.record_encode(len(data))
+            return data
+
+    def get_raw_data(self, convert_rate=None, convert_width=None):
+        if convert_rate is None and convert_width is None:
+            return self.frame_data
+        return self._encode_once(("raw", convert_rate, convert_width),
+                                 lambda: super(PreparedAudio, self).get_raw_data(convert_rate, convert_width))
+
+    def get_wav_data(self, convert_rate=None, convert_width=None):
+        return self._encode_once(("wav", convert_rate, convert_width),
+                                 lambda: super(PreparedAudio, self).get_wav_data(convert_rate, convert_width))
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        return self._encode_once(("flac", convert_rate, convert_width),
+                                 lambda: super(PreparedAudio, self).get_flac_data(convert_rate, convert_width))
+
+
+def resample(samples, from_rate, to_rate):
+    """
+    Resample float samples by linear interpolation.
+
+    Downsampling first averages over the rate ratio (a box filter), which
+    keeps most of the energy above the new Nyquist rate from aliasing into
+    the speech band without pulling in a DSP dependency.
+    """
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    ratio = from_rate / to_rate
+    if ratio > 1:
+        if ratio == int(ratio):
+            step = int(ratio)
+            usable = len(samples) - len(samples) % step
+            return samples[:usable].reshape(-1, step).mean(axis=1)
+        width = int(round(ratio))
+        if width > 1:
+            samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    count = int(len(samples) / ratio)
+    positions = np.arange(count, dtype=np.float64) * ratio
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class AudioPreprocessor:
+    """
+    Trims, downmixes and resamples an utterance for upload.
+
+    Frames quieter than the threshold are cut from both ends, keeping
+    pad_seconds either side of the speech, so the recognizer gets less of
+    the pre-roll and hangover the endpointer leaves in. Multi-channel audio
+    is averaged to mono and everything is converted to 16-bit at
+    target_rate. The result is a PreparedAudio, so its FLAC encoding is
+    shared by every request made for the utterance.
+
+    Audio with no frame over the threshold is passed through untrimmed and
+    left for the recognizer to reject.
+
+    Args:
+        target_rate (int or None): Rate the recognizer works best at; None
+            keeps the capture rate
+        min_rms (float): RMS, on the 16-bit scale, below which a frame is
+            always silence
+        relative_threshold (float): Fraction of the loudest frame's RMS
+            below which a frame is silence
+        pad_seconds (float): Audio kept before and after the speech
+        frame_seconds (float): Analysis frame length
+    """
+
+    def __init__(self, target_rate=16000, min_rms=100.0, relative_threshold=0.05, pad_seconds=0.15,
+                 frame_seconds=0.01):
+        self.target_rate = target_rate
+        self.min_rms = min_rms
+        self.relative_threshold = relative_threshold
+        self.pad_seconds = pad_seconds
+        self.frame_seconds = frame_seconds
+        self.stats = PrepStats()
+
+    def speech_bounds(self, samples, sample_rate):
+        """
+        Find where speech starts and ends, padded, as sample indices.
+
+        Returns:
+            tuple of int or None: (start, end), None when nothing is loud enough
+        """
+        frame = max(1, int(self.frame_seconds * sample_rate))
+        count = len(samples) // frame
+        if count == 0:
+            return None
+        frames = samples[:count * frame].reshape(count, frame)
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) * 32768.0
+        threshold = max(self.min_rms, self.relative_threshold * float(rms.max()))
+        loud = np.flatnonzero(rms >= threshold)
+        if len(loud) == 0:
+            return None
+        pad = int(self.pad_seconds * sample_rate)
+        start = max(0, loud[0] * frame - pad)
+        end = min(len(samples), (loud[-1] + 1) * frame + pad)
+        return start, end
+
+    def prepare(self, audio, channels=1):
+        """
+        Args:
+            audio (sr.AudioData): The captured utterance; interleaved when channels > 1
+            channels (int): Channels in audio.frame_data
+
+        Returns:
+            PreparedAudio: Trimmed 16-bit mono audio at target_rate
+        """
+        if isinstance(audio, PreparedAudio):
+            return audio
+        started = time.perf_counter()
+        width = audio.sample_width
+        rate = audio.sample_rate
+        samples = pcm_to_float(audio.frame_data, width)
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+        bounds = self.speech_bounds(samples, rate)
+        start, end = bounds if bounds is not None else (0, len(samples))
+        target_rate = self.target_rate or rate
+        if channels == 1 and width == 2 and target_rate == rate:
+            # Nothing to convert: slice the original bytes
+            data = audio.frame_data[start * 2:end * 2]
+        else:
+            converted = resample(samples[start:end], rate, target_rate)
+            data = (np.clip(converted * 32768.0, -32768, 32767)).astype("<i2").tobytes()
+        prepared = PreparedAudio(data, target_rate, 2, source=audio, stats=self.stats)
+        self.stats.record_prep(audio, prepared, time.perf_counter() - started, channels)
+        return prepared
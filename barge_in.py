@@ -0,0 +1,120 @@
+# barge_in.py
+# Detect the user talking over playback, and account for the work thrown away
+import audioop
+import collections
+import threading
+import time
+
+
+class InterruptionStats:
+    """Counters for replies that were cut short, by barge-in or by a newer turn."""
+
+    def __init__(self):
+        self.barge_ins = 0
+        self.cancelled_replies = 0
+        self.discarded_audio_bytes = 0
+        self.discarded_audio_seconds = 0.0
+        self.discarded_text_chars = 0
+        self.stop_latencies = []
+        self._lock = threading.Lock()
+
+    def record_discard(self, audio_bytes, audio_seconds, text_chars):
+        with self._lock:
+            self.cancelled_replies += 1
+            self.discarded_audio_bytes += audio_bytes
+            self.discarded_audio_seconds += audio_seconds
+            self.discarded_text_chars += text_chars
+
+    def record_barge_in(self, stop_latency):
+        with self._lock:
+            self.barge_ins += 1
+            self.stop_latencies.append(stop_latency)
+
+    def summary(self):
+        with self._lock:
+            latencies = sorted(self.stop_latencies)
+            return {
+                "barge_ins": self.barge_ins,
+                "cancelled_replies": self.cancelled_replies,
+                "discarded_audio_seconds": round(self.discarded_audio_seconds, 2),
+                "discarded_audio_bytes": self.discarded_audio_bytes,
+                "discarded_text_chars": self.discarded_text_chars,
+                "median_stop_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            }
+
+
+class BargeInMonitor:
+    """
+    Watches microphone chunks during playback for the user starting to speak.
+
+    The microphone also hears Aria's own voice, so a chunk only counts as
+    user speech when its energy clears both the ambient threshold and the
+    expected echo: the loudest recent output level times the echo gain,
+    multiplied by echo_margin. The echo gain is learned while the monitor
+    is armed and nobody is talking over playback, so it adapts to the
+    speaker volume and room. Speech has to persist for onset_seconds, which
+    keeps clicks and coughs from cutting a reply off.
+
+    Register feed() as a BufferedMicrophone listener and arm() the monitor
+    for the duration of playback.
+
+    Args:
+        recognizer (sr.Recognizer): Source of the ambient energy threshold
+        player (StreamingAudioPlayer): Source of the current output level
+        on_barge_in (callable): Called with the chunk index where speech began
+            and the perf_counter() time it began at
+        onset_seconds (float): Sustained speech required before interrupting
+        echo_margin (float): How far above the expected echo speech must be
+        echo_window_seconds (float): How far back output levels are considered
+    """
+
+    def __init__(self, recognizer, player, on_barge_in, onset_seconds=0.06, echo_margin=2.0,
+                 echo_window_seconds=0.3):
+        self.recognizer = recognizer
+        self.player = player
+        self.on_barge_in = on_barge_in
+        self.onset_seconds = onset_seconds
+        self.echo_margin = echo_margin
+        self.echo_window_seconds = echo_window_seconds
+        self.echo_gain = 0.5
+        self.enabled = True
+        self._armed = False
+        self._onset_index = None
+        self._onset_time = 0.0
+        self._levels = collections.deque()
+
+    def arm(self):
+        self._levels.clear()
+        self._onset_index = None
+        self._armed = True
+
+    def disarm(self):
+        self._armed = False
+
+    def feed(self, data, index, sample_width, seconds):
+        """Examine one captured chunk; called from the microphone capture thread."""
+        if not (self._armed and self.enabled):
+            return
+        self._levels.append(self.player.output_level)
+        while len(self._levels) > 1 and len(self._levels) * seconds > self.echo_window_seconds:
+            self._levels.popleft()
+        output_level = max(self._levels)
+        energy = audioop.rms(data, sample_width)
+        expected_echo = self.echo_gain * output_level
+        threshold = max(self.recognizer.energy_threshold, self.echo_margin * expected_echo)
+
+        if energy <= threshold:
+            self._onset_index = None
+            if output_level > 0:
+                # Quiet relative to the output: learn how much of it leaks back in
+                self.echo_gain = 0.95 * self.echo_gain + 0.05 * (energy / output_level)
+            return
+
+        if self._onset_index is None:
+            self._onset_index = index
+            self._onset_time = 0.0
+        self._onset_time += seconds
+        if self._onset_time >= self.onset_seconds:
+            self._armed = False
+            started_at = time.perf_counter() - self._onset_time
+            self.on_barge_in(self._onset_index, started_at)
@@ -0,0 +1,82 @@
+# bench_easter_eggs.py
+# Micro-benchmark: compiled PhraseMatcher vs the original substring loop
+#
+#   python bench_easter_eggs.py [--queries 2000] [--sizes 10 1000 50000]
+import argparse
+import random
+import time
+
+from phrase_matcher import PhraseMatcher
+
+WORDS = (
+    "aria open close the a door light music play stop weather time what is "
+    "how are you tell me joke sing song dream world take over hello marco "
+    "kitchen lamp volume up down news today tomorrow set timer alarm call "
+    "mom dad send message read email calendar meeting remind later please "
+    "thanks good night morning coffee tea start pause resume skip next back"
+).split()
+
+
+def legacy_lookup(table, text):
+    """The pre-matcher algorithm: exact lookup, then first substring hit in dict order."""
+    text = text.lower().strip()
+    if text in table:
+        return table[text]
+    for phrase, response in table.items():
+        if phrase in text:
+            return response
+    return None
+
+
+def make_table(size, rng):
+    table = {}
+    while len(table) < size:
+        phrase = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+        table[phrase] = f"response {len(table)}"
+    return table
+
+
+def make_queries(table, count, rng):
+    phrases = list(table)
+    queries = []
+    for i in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 14))]
+        if i % 2 == 0:
+            words.insert(rng.randint(0, len(words)), rng.choice(phrases))
+        queries.append(" ".join(words))
+    return queries
+
+
+def time_per_query(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark easter egg phrase matching")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'phrases':>8} {'build ms':>9} {'legacy us':>10} {'matcher us':>11} {'speedup':>8}")
+    for size in args.sizes:
+        table = make_table(size, rng)
+        queries = make_queries(table, args.queries, rng)
+
+        start = time.perf_counter()
+        matcher = PhraseMatcher(table)
+        matcher.compile()
+        build = time.perf_counter() - start
+
+        legacy = time_per_query(lambda q: legacy_lookup(table, q), queries)
+        compiled = time_per_query(matcher.search, queries)
+        print(f"{size:>8} {build * 1e3:>9.1f} {legacy * 1e6:>10.1f} "
+              f"{compiled * 1e6:>11.1f} {legacy / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
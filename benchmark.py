@@ -0,0 +1,322 @@
+# benchmark.py
+# Headless end-to-end benchmark: recorded WAVs in, stand-in APIs, timed playback out
+#
+# Each WAV is one user utterance. Its transcript comes from a sidecar JSON
+# (clip.json: {"transcript": "what time is it"}) or, failing that, from the
+# file name with underscores as spaces. Nothing touches the network or an
+# audio device, so this can run in CI:
+#
+#   python benchmark.py recordings/ --speed 2 --max-p95-ms 1500
+import argparse
+import audioop
+import bisect
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+from asr_backends import FakeBackend, HedgedRecognizer
+from audio_player import PlaybackStats
+from headless import HeadlessSignalEmitter
+from mic_stream import BufferedMicrophone
+from stand_in_server import FakeApiConfig, FakeApiHandler, StandInServer
+from trace_report import percentile
+from tracing import STAGES
+
+
+class WavMicrophone(BufferedMicrophone):
+    """
+    Plays a list of WAV files into the pipeline in place of the microphone.
+
+    The files are converted to 16-bit mono at the first file's rate, joined
+    with gap_seconds of silence between them, and delivered chunk by chunk
+    at speed times real time. After the last file it keeps producing
+    silence and sets finished.
+
+    transcript_for_audio() finds which clip a captured utterance came from
+    by locating its samples in the feed, so a fake recognizer can return
+    the right transcript even when requests are hedged or turns cancelled.
+    """
+
+    def __init__(self, recognizer, paths, transcripts, speed=1.0, gap_seconds=3.0,
+                 lead_in_seconds=1.0, chunk_size=1024):
+        rate = None
+        pieces = []
+        for path in paths:
+            with wave.open(path, "rb") as wav:
+                data = wav.readframes(wav.getnframes())
+                width = wav.getsampwidth()
+                if wav.getnchannels() == 2:
+                    data = audioop.tomono(data, width, 0.5, 0.5)
+                if width != 2:
+                    data = audioop.lin2lin(data, width, 2)
+                if rate is None:
+                    rate = wav.getframerate()
+                elif wav.getframerate() != rate:
+                    data, _ = audioop.ratecv(data, 2, 1, wav.getframerate(), rate, None)
+            pieces.append(data)
+        rate = rate or 16000
+        gap = b"\x00\x00" * int(gap_seconds * rate)
+        data = bytearray(b"\x00\x00" * int(lead_in_seconds * rate))
+        self._clip_starts = []
+        self._clip_ends = []
+        for piece in pieces:
+            self._clip_starts.append(len(data))
+            data += piece
+            self._clip_ends.append(len(data))
+            data += gap
+        self._data = bytes(data)
+        self.transcripts = list(transcripts)
+        self.speed = speed
+        self.finished = threading.Event()
+        self._setup(recognizer, rate, 2, chunk_size, buffer_seconds=30.0, warmup_seconds=0.5)
+
+    def _open_device(self):
+        self._position = 0
+        self._next_read = time.perf_counter()
+
+    def _read_device(self):
+        self._next_read += self.seconds_per_chunk / self.speed
+        delay = self._next_read - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        size = self.CHUNK * self.SAMPLE_WIDTH
+        chunk = self._data[self._position:self._position + size]
+        self._position += size
+        if len(chunk) < size:
+            self.finished.set()
+            chunk += b"\x00" * (size - len(chunk))
+        return chunk
+
+    def _close_device(self):
+        pass
+
+    def transcript_for_audio(self, audio, probe_bytes=256):
+        # Preprocessed audio is resampled and trimmed; look up the capture instead
+        audio = getattr(audio, "source", None) or audio
+        frames = audio.frame_data
+        middle = (len(frames) // 2) & ~1
+        probe = frames[middle:middle + probe_bytes]
+        if not probe.strip(b"\x00"):
+            return ""
+        offset = self._data.find(probe)
+        clip = bisect.bisect_right(self._clip_starts, offset) - 1
+        if offset < 0 or clip < 0 or offset >= self._clip_ends[clip]:
+            return ""
+        return self.transcripts[clip]
+
+
+class TimingSink:
+    """Replaces StreamingAudioPlayer: records when audio would start and how much arrived."""
+
+    def __init__(self, sample_rate=22050, realtime=False):
+        self.sample_rate = sample_rate
+        self.frame_bytes = 2
+        self.block_seconds = 0.0
+        self.output_level = 0
+        self.realtime = realtime
+        self.bytes_received = 0
+        self._stopped = threading.Event()
+
+    def play(self, chunks):
+        self._stopped.clear()
+        stats = PlaybackStats(time.perf_counter())
+        for chunk in chunks:
+            if self._stopped.is_set():
+                break
+            if stats.first_sample_at is None:
+                stats.first_sample_at = time.perf_counter()
+            stats.bytes_played += len(chunk)
+            if self.realtime:
+                time.sleep(len(chunk) / (self.sample_rate * self.frame_bytes))
+        self.bytes_received += stats.bytes_played
+        stats.finished_at = time.perf_counter()
+        return stats
+
+    def open(self):
+        pass
+
+    def stop(self):
+        self._stopped.set()
+        return 0
+
+
+def find_clips(paths):
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            clips.extend(sorted(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True)))
+        else:
+            clips.append(path)
+    return clips
+
+
+def transcript_for(path):
+    try:
+        with open(os.path.splitext(path)[0] + ".json", "r", encoding="utf-8") as f:
+            return json.load(f)["transcript"]
+    except (OSError, KeyError, ValueError):
+        return os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmark")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories of them")
+    parser.add_argument("--speed", type=float, default=1.0, help="audio feed rate, multiple of real time")
+    parser.add_argument("--gap", type=float, default=3.0,
+                        help="seconds of silence between clips; shorter than a reply and the next clip barges in")
+    parser.add_argument("--asr-latency", type=float, default=0.3)
+    parser.add_argument("--uplink-kbps", type=float,
+                        help="add the time to upload each utterance's FLAC at this speed to ASR latency")
+    parser.add_argument("--no-audio-prep", action="store_true",
+                        help="upload captures untrimmed and at the capture rate")
+    parser.add_argument("--first-token", type=float, default=0.3, help="LLM first-token delay, seconds")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="LLM tokens per second")
+    parser.add_argument("--tts-first-byte", type=float, default=0.2, help="TTS first-byte delay, seconds")
+    parser.add_argument("--tts-speed", type=float, default=4.0, help="TTS audio per wall second, x real time")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds on every stand-in delay")
+    parser.add_argument("--realtime-playback", action="store_true",
+                        help="hold the sink for the duration of the audio, like a speaker would")
+    parser.add_argument("--no-response-cache", action="store_true")
+    parser.add_argument("--speculate", action="store_true",
+                        help="start the LLM on partial transcripts at pauses (ARIA_SPECULATE)")
+    parser.add_argument("--max-p95-ms", type=float, help="exit non-zero if turn p95 exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    clips = find_clips(args.paths)
+    if not clips:
+        sys.exit("No WAV files found")
+
+    config = FakeApiConfig(
+        first_token_delay=args.first_token,
+        tokens_per_second=args.token_rate,
+        tts_first_byte_delay=args.tts_first_byte,
+        tts_realtime_factor=args.tts_speed,
+        jitter=args.jitter,
+        seed=args.seed,
+    )
+    server = StandInServer(FakeApiHandler, config=config).start()
+    workdir = tempfile.mkdtemp(prefix="aria-bench-")
+    trace_path = os.path.join(workdir, "trace.jsonl")
+    # Module-level settings are read at import time, so set them before importing assistant
+    os.environ.update({
+        "OPENAI_BASE_URL": server.url + "/v1",
+        "ELEVENLABS_BASE_URL": server.url,
+        "OPENAI_API_KEY": "stand-in",
+        "ELEVENLABS_API_KEY": "stand-in",
+        "ARIA_CACHE_DIR": workdir,
+        "ARIA_TRACE_FILE": trace_path,
+    })
+    from assistant import SimpleVoiceAssistant
+    from response_cache import ResponseCache
+
+    assistant = SimpleVoiceAssistant(HeadlessSignalEmitter())
+    sink = TimingSink(realtime=args.realtime_playback)
+    assistant.player = sink
+    assistant.barge_in.player = sink
+    if args.no_response_cache:
+        assistant.response_cache = ResponseCache(max_entries=0)
+    assistant.speculative = args.speculate
+
+    microphone = WavMicrophone(assistant.recognizer, clips, [transcript_for(path) for path in clips],
+                               speed=args.speed, gap_seconds=args.gap)
+    assistant.asr = HedgedRecognizer([FakeBackend(
+        microphone.transcript_for_audio,
+        latency=args.asr_latency,
+        jitter=args.jitter,
+        seed=args.seed,
+        upload_bytes_per_second=args.uplink_kbps * 1000 / 8 if args.uplink_kbps else None,
+    )])
+    if args.no_audio_prep:
+        assistant.audio_prep = None
+    assistant.make_microphone = lambda recognizer: microphone
+
+    started = time.perf_counter()
+    runner = threading.Thread(target=assistant.run, daemon=True)
+    runner.start()
+    microphone.finished.wait()
+    assistant.scheduler.idle.wait()
+    assistant.quiet.wait()
+    elapsed = time.perf_counter() - started
+    assistant.stop_listening.set()
+    microphone.stop()
+    runner.join(timeout=5)
+    server.stop()
+
+    records = []
+    if os.path.exists(trace_path):
+        with open(trace_path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    completed = [r for r in records if not r.get("cancelled") and "playback_start" in r["stages_ms"]]
+    latencies = sorted(r["stages_ms"]["playback_start"] for r in completed)
+    stages = {}
+    for stage in STAGES:
+        values = sorted(r["stages_ms"][stage] for r in completed if stage in r["stages_ms"])
+        if values:
+            stages[stage] = {q: percentile(values, q) for q in (50, 95, 99)}
+
+    summary = {
+        "clips": len(clips),
+        "turns": len(records),
+        "completed": len(completed),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_turns_per_min": round(len(completed) / elapsed * 60, 2) if elapsed else 0.0,
+        "turn_latency_ms": {q: percentile(latencies, q) for q in (50, 95, 99)} if latencies else None,
+        "stages_ms": stages,
+        "http_connections": server.connections,
+        "http_requests": len(server.requests),
+        "speculation": assistant.speculator.stats.summary() if args.speculate else None,
+        "intents": assistant.intents.stats.summary(),
+        "interruptions": assistant.interruptions.summary(),
+        "audio_prep": assistant.audio_prep.stats.summary() if assistant.audio_prep is not None else None,
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{summary['completed']}/{len(clips)} clips answered in {summary['elapsed_s']} s "
+              f"({summary['throughput_turns_per_min']} turns/min), "
+              f"{server.connections} connections for {len(server.requests)} requests")
+        print(f"{'stage':<16} {'p50':>8} {'p95':>8} {'p99':>8}   (ms since end of speech)")
+        for stage, values in stages.items():
+            print(f"{stage:<16} {values[50]:>8.0f} {values[95]:>8.0f} {values[99]:>8.0f}")
+        speculation = summary["speculation"]
+        if speculation:
+            print(f"speculation: {speculation['committed']}/{speculation['attempts']} committed, "
+                  f"median {speculation['median_saved_ms']} ms saved, "
+                  f"{speculation['wasted_tokens']} tokens wasted in {speculation['wasted_requests']} requests")
+        intents = summary["intents"]
+        if intents["handled_locally"]:
+            print(f"intents: {intents['handled_locally']}/{intents['turns']} turns answered locally "
+                  f"({intents['llm_requests_avoided_pct']}% of LLM requests avoided), {intents['hits']}")
+        interruptions = summary["interruptions"]
+        if interruptions["cancelled_replies"]:
+            print(f"interruptions: {interruptions['barge_ins']} barge-ins, median stop "
+                  f"{interruptions['median_stop_ms']} ms, {interruptions['cancelled_replies']} replies cut short "
+                  f"({interruptions['discarded_audio_seconds']} s of audio, "
+                  f"{interruptions['discarded_text_chars']} chars discarded)")
+        prep = summary["audio_prep"]
+        if prep:
+            print(f"audio prep: {prep['bytes_in']} -> {prep['bytes_out']} PCM bytes ({prep['saved_pct']}% saved, "
+                  f"{prep['trimmed_s']} s of silence trimmed), {prep['mean_prep_ms']} ms per utterance, "
+                  f"{prep['flac_encodes']} FLAC encodes reused {prep['flac_reuses']} times")
+
+    if len(completed) < len(clips):
+        print(f"Only {len(completed)} of {len(clips)} clips produced a reply", file=sys.stderr)
+        sys.exit(1)
+    if args.max_p95_ms is not None and latencies and percentile(latencies, 95) > args.max_p95_ms:
+        print(f"Turn latency p95 {percentile(latencies, 95):.0f} ms exceeds {args.max_p95_ms:.0f} ms",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
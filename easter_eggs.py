@@ -1,7 +1,11 @@
 # easter_eggs.py
 # Collection of fun responses for specific phrases
+import json
+import os
 import random
 
+from phrase_matcher import PhraseMatcher
+
 EASTER_EGGS = {
     "hello aria": [
         "Hi there! How can I help you today?",
@@ -64,34 +68,82 @@ EASTER_EGGS = {
     ]
 }
 
+# Phrases shipped with Aria, as opposed to ones loaded from ARIA_EASTER_EGGS_FILE
+BUILTIN_PHRASES = frozenset(EASTER_EGGS)
+
+_matcher = None
+
+
+def load_easter_eggs(path):
+    """
+    Merge phrases from a JSON file into EASTER_EGGS.
+
+    The file holds the same shape as EASTER_EGGS: an object mapping each
+    trigger phrase to a response string or a list of alternatives.
+
+    Args:
+        path (str): Path to the JSON phrase table
+    """
+    global _matcher
+    with open(path, "r", encoding="utf-8") as f:
+        EASTER_EGGS.update(json.load(f))
+    _matcher = None
+
+
+def get_matcher():
+    """Return the compiled matcher for EASTER_EGGS, building it on first use."""
+    global _matcher
+    if _matcher is None:
+        matcher = PhraseMatcher(EASTER_EGGS)
+        matcher.compile()
+        _matcher = matcher
+    return _matcher
+
+
 def get_easter_egg_response(text):
     """
-    Check if the input text matches any Easter egg phrases.
+    Check if the input text contains any Easter egg phrase.
     Returns a random response if found, otherwise returns None.
 
+    Phrases match on whole words. If several are present, the longest one
+    wins, so "are you going to take over the world" beats "take over".
+
     Args:
         text (str): The input text to check for Easter eggs
 
     Returns:
         str or None: A matching Easter egg response or None
     """
-    # Convert to lowercase for case-insensitive matching
-    text = text.lower().strip()
-
-    # Check for exact matches first
-    if text in EASTER_EGGS:
-        responses = EASTER_EGGS[text]
-        if isinstance(responses, list):
-            # If multiple responses, choose a random one
-            return random.choice(responses)
-        return responses
-
-    # Check for partial matches
+    match = get_matcher().search(text)
+    if match is None:
+        return None
+    response = match[1]
+    if isinstance(response, list):
+        # If multiple responses, choose a random one
+        return random.choice(response)
+    return response
+
+def all_responses(builtin_only=False, limit=None):
+    """
+    List every distinct canned response, e.g. for prewarming the TTS cache.
+
+    Args:
+        builtin_only (bool): Skip phrases loaded with load_easter_eggs()
+        limit (int or None): Return at most this many
+
+    Returns:
+        list of str: Unique responses in table order
+    """
+    seen = {}
     for phrase, response in EASTER_EGGS.items():
-        if phrase in text:
-            if isinstance(response, list):
-                return random.choice(response)
-            return response
+        if builtin_only and phrase not in BUILTIN_PHRASES:
+            continue
+        for option in (response if isinstance(response, list) else [response]):
+            seen.setdefault(option, None)
+            if limit is not None and len(seen) >= limit:
+                return list(seen)
+    return list(seen)
+
 
-    # No match found
-    return None
+if os.getenv("ARIA_EASTER_EGGS_FILE"):
+    load_easter_eggs(os.getenv("ARIA_EASTER_EGGS_FILE"))
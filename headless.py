@@ -0,0 +1,28 @@
+# headless.py
+# Qt-free stand-ins so SimpleVoiceAssistant can run without a window
+class HeadlessSignal:
+    """Mimics the connect()/emit() surface of a pyqtSignal, calling slots directly."""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self._slots:
+            slot(*args)
+
+
+class HeadlessSignalEmitter:
+    """Drop-in replacement for SignalEmitter with the same signal names."""
+
+    def __init__(self):
+        self.update_text_signal = HeadlessSignal()
+        self.listening_signal = HeadlessSignal()
+        self.thinking_signal = HeadlessSignal()
+        self.transcribe_signal = HeadlessSignal()
+        self.response_ready_signal = HeadlessSignal()
+        self.response_delta_signal = HeadlessSignal()
+        self.status_signal = HeadlessSignal()
+        self.ready_signal = HeadlessSignal()
@@ -0,0 +1,62 @@
+# hedge_check.py
+# Check that HedgedRecognizer hedges slow requests but not definite misses,
+# using FakeBackend so no network is needed
+#
+#   python hedge_check.py
+import sys
+import time
+
+import speech_recognition as sr
+
+from asr_backends import FakeBackend, HedgedRecognizer
+
+AUDIO = sr.AudioData(b"\0\0" * 1600, 16000, 2)
+
+
+def run(backends, **kwargs):
+    """Recognize once; returns (transcript or None, seconds taken, hedges, calls per backend)."""
+    recognizer = HedgedRecognizer(backends, **kwargs)
+    started = time.perf_counter()
+    try:
+        text = recognizer.recognize(AUDIO)
+    except sr.UnknownValueError:
+        text = None
+    elapsed = time.perf_counter() - started
+    # Let abandoned requests finish so their calls are counted
+    recognizer._pool.shutdown(wait=True)
+    calls = [backend.stats.successes + backend.stats.failures for backend in backends]
+    return text, elapsed, recognizer.hedges, calls
+
+
+def main():
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    text, elapsed, hedges, calls = run([FakeBackend("hello", latency=0.3, failure_rate=1.0)])
+    check("miss costs one call", text is None and calls == [1] and elapsed < 0.5,
+          f"{calls[0]} calls, {hedges} hedges, {elapsed:.2f} s")
+
+    text, elapsed, hedges, calls = run([FakeBackend("hello", latency=0.5)], initial_deadline=0.3)
+    check("slow backend gets one hedge", text == "hello" and hedges == 1 and calls == [2],
+          f"{calls[0]} calls, {hedges} hedges, {elapsed:.2f} s")
+
+    text, elapsed, hedges, calls = run([FakeBackend("hello", latency=0.1, failure_rate=1.0, name="primary"),
+                                        FakeBackend("hello", latency=0.1, name="fallback")])
+    check("miss falls back to another backend", text == "hello" and calls == [1, 1],
+          f"calls {calls}, {hedges} hedges, {elapsed:.2f} s")
+
+    text, elapsed, hedges, calls = run([FakeBackend("hello", latency=0.1)])
+    check("fast backend is not hedged", text == "hello" and hedges == 0 and calls == [1],
+          f"{calls[0]} calls, {hedges} hedges, {elapsed:.2f} s")
+
+    if failures:
+        print(f"{len(failures)} check(s) failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
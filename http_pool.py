@@ -0,0 +1,126 @@
+# http_pool.py
+# One shared, pre-warmed HTTP connection pool for the OpenAI and ElevenLabs clients
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx only needs it to be importable)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Point these at a local stand-in server (see stand_in_server.py) to test offline
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+
+
+def origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class ConnectionPool:
+    """
+    A tuned httpx.Client shared by every API client in the process.
+
+    Connections are kept alive between turns, multiplexed over HTTP/2 when
+    the h2 package is installed, and can be opened ahead of time with
+    preconnect() so the DNS, TCP and TLS handshakes happen outside the
+    user's turn. start_keepalive() re-touches each registered origin after
+    an idle gap so the pooled connections do not expire between turns.
+
+    Args:
+        max_connections (int): Upper bound on open connections
+        max_keepalive (int): Idle connections kept open for reuse
+        keepalive_expiry (float): Seconds an idle connection is kept
+        timeout (float): Read/write timeout in seconds
+        connect_timeout (float): Connect timeout in seconds
+        http2 (bool or None): Force HTTP/2 on or off; None uses it when available
+    """
+
+    def __init__(self, max_connections=20, max_keepalive=10, keepalive_expiry=120.0, timeout=30.0,
+                 connect_timeout=5.0, http2=None):
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.keepalive_expiry = keepalive_expiry
+        self.origins = []
+        self.last_activity = 0.0
+        self._stop = threading.Event()
+        self._keepalive_thread = None
+        self.client = httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            event_hooks={"request": [self._touch]},
+        )
+
+    def _touch(self, request):
+        self.last_activity = time.monotonic()
+
+    def register(self, base_url):
+        """Add the origin of base_url to the set that preconnect() warms."""
+        host = origin(base_url)
+        if host not in self.origins:
+            self.origins.append(host)
+        return base_url
+
+    def warm(self):
+        """Open (or refresh) a pooled connection to every registered origin."""
+        for host in self.origins:
+            try:
+                # Any response will do; the point is the handshake and the pooled socket
+                self.client.head(host, timeout=5.0)
+            except httpx.HTTPError as e:
+                print(f"Pre-connect to {host} failed: {e}")
+
+    def preconnect(self):
+        thread = threading.Thread(target=self.warm, daemon=True)
+        thread.start()
+        return thread
+
+    def start_keepalive(self, interval=45.0):
+        """
+        Refresh connections whenever the pool has been idle for interval seconds.
+
+        interval should stay below both keepalive_expiry and the servers'
+        own idle timeouts.
+        """
+        if self._keepalive_thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                if time.monotonic() - self.last_activity >= interval:
+                    self.warm()
+
+        self._keepalive_thread = threading.Thread(target=loop, daemon=True)
+        self._keepalive_thread.start()
+
+    def close(self):
+        self._stop.set()
+        self.client.close()
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_pool(**kwargs):
+    """
+    Return the process-wide pool, creating it on first use.
+
+    kwargs are passed to ConnectionPool and only matter on that first call,
+    so a server can size the pool before any session asks for it.
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool(**kwargs)
+        return _shared_pool
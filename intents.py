@@ -0,0 +1,463 @@
+# intents.py
+# Local fast path: answer deterministic requests without a round trip to the LLM
+import collections
+import datetime
+import math
+import random
+import re
+import threading
+import time
+
+import easter_eggs
+
+_FILLER = {"hey", "hi", "aria", "please", "ok", "okay", "so", "um", "uh", "well", "now", "just", "quickly"}
+_WORD_NUMBERS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30,
+    "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+# Polite openings that do not count against a pattern's coverage
+LEAD_IN = r"(?:(?:can|could|would) you |(?:tell|give) me |do you know )*"
+
+NUMBER = r"-?\d+(?:\.\d+)?"
+
+
+def normalize(text):
+    """
+    Lowercase, drop punctuation and filler words, and spell numbers as digits.
+
+    Arithmetic symbols and decimal points survive, so "What's 2.5 + 3?"
+    becomes "what's 2.5 + 3", and "three hundred and twenty five" becomes
+    "325" (see join_number_words()).
+    """
+    text = re.sub(r"[^a-z0-9.+\-*/%' ]", " ", text.lower())
+    text = re.sub(r"([+*/%])", r" \1 ", text)
+    words = [word.strip(".'") for word in text.split()]
+    return " ".join(join_number_words(word for word in words if word and word not in _FILLER))
+
+
+def join_number_words(words):
+    """
+    Replace spelled-out numbers below a thousand with digits.
+
+    "twenty five" is 25 and "one hundred and five" is 105. Words that do
+    not form one number, like "two five", stay separate numbers, which no
+    pattern accepts, so the request falls through to the LLM.
+    """
+    out = []
+    hundreds = rest = None
+    pending_and = False
+
+    def flush():
+        nonlocal hundreds, rest
+        if hundreds is not None or rest is not None:
+            out.append(str((hundreds or 0) * 100 + (rest or 0)))
+        hundreds = rest = None
+
+    for word in words:
+        if word == "and" and hundreds is not None and rest is None and not pending_and:
+            pending_and = True
+            continue
+        value = _WORD_NUMBERS.get(word)
+        if word == "hundred":
+            if hundreds is None and not pending_and and (rest is None or rest < 100):
+                hundreds, rest = rest or 1, None
+                continue
+            value = None
+        if value is None:
+            flush()
+            if pending_and:
+                out.append("and")
+            out.append(word)
+        elif rest is None:
+            rest = value
+        elif rest >= 20 and rest % 10 == 0 and value < 10:
+            rest += value
+        else:
+            flush()
+            rest = value
+        pending_and = False
+    flush()
+    if pending_and:
+        out.append("and")
+    return out
+
+
+def format_number(value):
+    """Speakable number: integers without a decimal point, others to two places."""
+    if abs(value - round(value)) < 1e-9:
+        return str(int(round(value)))
+    if abs(value) >= 1:
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    return f"{value:.3g}"
+
+
+def parse_amount(text):
+    return 1.0 if text in ("a", "an") else float(text)
+
+
+class IntentContext:
+    """
+    What handlers may use from the conversation.
+
+    Args:
+        last_reply (str or None): The last thing Aria said
+        start_timer (callable or None): (seconds, label) -> None; None when
+            this session cannot run timers
+        now (callable): Returns the current datetime
+    """
+
+    def __init__(self, last_reply=None, start_timer=None, now=datetime.datetime.now):
+        self.last_reply = last_reply
+        self.start_timer = start_timer
+        self.now = now
+
+
+class Intent:
+    """
+    A kind of request that can be answered locally.
+
+    Subclasses implement match(), returning (confidence, params) or None,
+    and handle(), returning the reply or None to decline and let the LLM
+    answer after all. match() must not have side effects: it is also used
+    to decide whether a partial transcript is worth speculating on.
+    """
+
+    name = "intent"
+
+    def match(self, text):
+        raise NotImplementedError
+
+    def handle(self, params, context):
+        raise NotImplementedError
+
+
+class PatternIntent(Intent):
+    """
+    Regex patterns with named groups, answered by a handler function.
+
+    Patterns are matched against normalized text (see normalize()) and
+    must run to its end, after an optional polite lead-in, so nothing the
+    user said after the match is ignored: "what time is it in tokyo" and
+    "what is 2 plus 3 times 4" do not match at all. Words before the match
+    are allowed, but confidence is the intent's base confidence times the
+    fraction of the text the pattern covered, so an unexplained opening
+    makes the router fall through to the LLM.
+
+    Args:
+        name (str): Reported in stats and traces
+        patterns (list of str): Regular expressions; the first to match is used
+        handler (callable): (params dict, IntentContext) -> str or None
+        confidence (float): Confidence of a match that covers the whole text
+    """
+
+    def __init__(self, name, patterns, handler, confidence=1.0):
+        self.name = name
+        self.patterns = [re.compile(rf"{LEAD_IN}(?:{pattern})$") for pattern in patterns]
+        self.handler = handler
+        self.confidence = confidence
+
+    def match(self, text):
+        text = normalize(text)
+        if not text:
+            return None
+        for pattern in self.patterns:
+            found = pattern.search(text)
+            if found is not None:
+                coverage = (found.end() - found.start()) / len(text)
+                return self.confidence * coverage, found.groupdict()
+        return None
+
+    def handle(self, params, context):
+        return self.handler(params, context)
+
+
+class EasterEggIntent(Intent):
+    """
+    The easter_eggs phrase table as an intent.
+
+    A phrase anywhere in the text is a full-confidence match, as it has
+    always been, so "hello aria, how are you" still gets a canned reply.
+    """
+
+    name = "easter_egg"
+
+    def match(self, text):
+        found = easter_eggs.get_matcher().search(text)
+        if found is None:
+            return None
+        return 1.0, {"response": found[1]}
+
+    def handle(self, params, context):
+        response = params["response"]
+        return random.choice(response) if isinstance(response, list) else response
+
+
+class IntentMatch:
+    """The intent chosen for a transcript and, once handled, its reply."""
+
+    def __init__(self, intent, confidence, params):
+        self.intent = intent
+        self.confidence = confidence
+        self.params = params
+        self.response = None
+
+    @property
+    def name(self):
+        return self.intent.name
+
+
+class IntentStats:
+    """Per-intent hit counts, and how much traffic went to the LLM instead."""
+
+    def __init__(self):
+        self.turns = 0
+        self.hits = collections.Counter()
+        self.below_threshold = collections.Counter()
+        self.declined = collections.Counter()
+        self.handler_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, outcome, name=None, elapsed=0.0):
+        with self._lock:
+            self.turns += 1
+            if outcome != "miss":
+                getattr(self, outcome)[name] += 1
+            self.handler_seconds += elapsed
+
+    def summary(self):
+        with self._lock:
+            handled = sum(self.hits.values())
+            return {
+                "turns": self.turns,
+                "handled_locally": handled,
+                "llm_requests_avoided_pct": round(100 * handled / self.turns, 1) if self.turns else None,
+                "mean_handler_us": round(self.handler_seconds / handled * 1e6, 1) if handled else None,
+                "hits": dict(self.hits.most_common()),
+                "below_threshold": dict(self.below_threshold),
+                "declined": dict(self.declined),
+            }
+
+
+class IntentRouter:
+    """
+    Picks the intent that should answer a transcript, if any.
+
+    Every intent scores the text; the most confident wins, ties going to
+    the one added first. A winner below threshold falls through to the
+    LLM, as does one whose handler declines.
+
+    Args:
+        intents (list of Intent or None): Initial intents, in priority order
+        threshold (float): Minimum confidence to answer locally
+    """
+
+    def __init__(self, intents=None, threshold=0.75):
+        self.intents = list(intents or [])
+        self.threshold = threshold
+        self.stats = IntentStats()
+
+    def add(self, intent):
+        self.intents.append(intent)
+        return intent
+
+    def _best(self, text):
+        best = None
+        for intent in self.intents:
+            found = intent.match(text)
+            if found is not None and (best is None or found[0] > best.confidence):
+                best = IntentMatch(intent, *found)
+        return best
+
+    def match(self, text):
+        """
+        Returns:
+            IntentMatch or None: The confident match, without running its
+            handler or counting it
+        """
+        best = self._best(text)
+        return best if best is not None and best.confidence >= self.threshold else None
+
+    def route(self, text, context=None):
+        """
+        Answer text locally if an intent is confident and willing.
+
+        Returns:
+            IntentMatch or None: The match with its response set, or None
+            when the LLM should answer
+        """
+        best = self._best(text)
+        if best is None:
+            self.stats.record("miss")
+            return None
+        if best.confidence < self.threshold:
+            self.stats.record("below_threshold", best.name)
+            return None
+        started = time.perf_counter()
+        best.response = best.intent.handle(best.params, context or IntentContext())
+        elapsed = time.perf_counter() - started
+        if not best.response:
+            self.stats.record("declined", best.name, elapsed)
+            return None
+        self.stats.record("hits", best.name, elapsed)
+        return best
+
+
+# Built-in handlers
+
+def tell_time(params, context):
+    now = context.now()
+    return f"It's {now.hour % 12 or 12}:{now.minute:02d} {'AM' if now.hour < 12 else 'PM'}."
+
+
+def tell_date(params, context):
+    now = context.now()
+    return f"Today is {now:%A}, {now:%B} {now.day}, {now.year}."
+
+
+def calculate(params, context):
+    a = float(params["a"]) if params.get("a") is not None else None
+    b = float(params["b"])
+    op = params["op"]
+    if op in ("plus", "+"):
+        result = a + b
+    elif op in ("minus", "-"):
+        result = a - b
+    elif op in ("times", "x", "*", "multiplied by"):
+        result = a * b
+    elif op in ("divided by", "over", "/"):
+        if b == 0:
+            return "You can't divide by zero."
+        result = a / b
+    elif op in ("percent of", "% of"):
+        result = a / 100 * b
+    elif op == "squared":
+        result = b * b
+    elif op == "square root of":
+        if b < 0:
+            return None
+        result = math.sqrt(b)
+    else:
+        return None
+    return f"That's {format_number(result)}."
+
+
+# (aliases, dimension, factor to the dimension's base unit, singular, plural)
+_UNITS = [
+    (("millimeters", "millimeter", "millimetres", "millimetre", "mm"), "length", 0.001, "millimeter", "millimeters"),
+    (("centimeters", "centimeter", "centimetres", "centimetre", "cm"), "length", 0.01, "centimeter", "centimeters"),
+    (("meters", "meter", "metres", "metre"), "length", 1.0, "meter", "meters"),
+    (("kilometers", "kilometer", "kilometres", "kilometre", "km"), "length", 1000.0, "kilometer", "kilometers"),
+    (("inches", "inch"), "length", 0.0254, "inch", "inches"),
+    (("feet", "foot"), "length", 0.3048, "foot", "feet"),
+    (("yards", "yard"), "length", 0.9144, "yard", "yards"),
+    (("miles", "mile"), "length", 1609.344, "mile", "miles"),
+    (("grams", "gram", "g"), "mass", 0.001, "gram", "grams"),
+    (("kilograms", "kilogram", "kilos", "kilo", "kg"), "mass", 1.0, "kilogram", "kilograms"),
+    (("ounces", "ounce", "oz"), "mass", 0.028349523125, "ounce", "ounces"),
+    (("pounds", "pound", "lbs", "lb"), "mass", 0.45359237, "pound", "pounds"),
+    (("milliliters", "milliliter", "millilitres", "millilitre", "ml"), "volume", 0.001, "milliliter", "milliliters"),
+    (("liters", "liter", "litres", "litre"), "volume", 1.0, "liter", "liters"),
+    (("cups", "cup"), "volume", 0.2365882365, "cup", "cups"),
+    (("gallons", "gallon"), "volume", 3.785411784, "gallon", "gallons"),
+    (("celsius", "centigrade"), "temperature", None, "degree Celsius", "degrees Celsius"),
+    (("fahrenheit",), "temperature", None, "degree Fahrenheit", "degrees Fahrenheit"),
+    (("kelvin",), "temperature", None, "kelvin", "kelvin"),
+]
+_UNIT_BY_ALIAS = {alias: unit for unit in _UNITS for alias in unit[0]}
+UNIT = "(?:degrees )?(?:" + "|".join(sorted(_UNIT_BY_ALIAS, key=len, reverse=True)) + r")\b"
+
+
+def _to_celsius(value, unit):
+    if unit == "fahrenheit":
+        return (value - 32) * 5 / 9
+    if unit == "kelvin":
+        return value - 273.15
+    return value
+
+
+def _from_celsius(value, unit):
+    if unit == "fahrenheit":
+        return value * 9 / 5 + 32
+    if unit == "kelvin":
+        return value + 273.15
+    return value
+
+
+def convert_units(params, context):
+    amount = parse_amount(params["amount"])
+    source = _UNIT_BY_ALIAS[params["src"].replace("degrees ", "")]
+    target = _UNIT_BY_ALIAS[params["dst"].replace("degrees ", "")]
+    if source[1] != target[1]:
+        return None
+    if source[1] == "temperature":
+        result = _from_celsius(_to_celsius(amount, source[0][0]), target[0][0])
+    else:
+        result = amount * source[2] / target[2]
+    source_name = source[3] if amount == 1 else source[4]
+    target_name = target[3] if result == 1 else target[4]
+    return f"{format_number(amount)} {source_name} is {format_number(result)} {target_name}."
+
+
+_SECONDS_PER = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def set_timer(params, context):
+    if context.start_timer is None:
+        return None
+    amount = parse_amount(params["amount"])
+    unit = params["unit"]
+    seconds = amount * _SECONDS_PER[unit]
+    if seconds <= 0:
+        return None
+    label = f"{format_number(amount)} {unit}{'' if amount == 1 else 's'}"
+    context.start_timer(seconds, label)
+    return f"Timer set for {label}."
+
+
+def repeat_last(params, context):
+    return context.last_reply or "I haven't said anything yet."
+
+
+OPERATOR = r"plus|\+|minus|-|times|x|\*|multiplied by|divided by|over|/|percent of|% of"
+AMOUNT = rf"{NUMBER}|an?"
+TIME_UNIT = r"(?P<unit>second|minute|hour)s?"
+
+
+def default_router(threshold=0.75):
+    """The built-in intents: easter eggs, time, date, arithmetic, units, timers and repeat."""
+    return IntentRouter([
+        EasterEggIntent(),
+        PatternIntent("time", [
+            r"what(?:'s| is) the (?:current )?time(?: now| right now)?",
+            r"what time is it(?: now| right now)?",
+            r"what time it is",
+            r"(?:tell me |give me )?the (?:current )?time",
+            r"current time",
+        ], tell_time),
+        PatternIntent("date", [
+            r"what(?:'s| is) (?:the date today|the date|today's date|today)",
+            r"what day is (?:it|today)(?: today)?",
+            r"(?:tell me |give me )?(?:today's|the) date",
+        ], tell_date),
+        PatternIntent("arithmetic", [
+            rf"(?:what(?:'s| is) |calculate )?(?P<a>{NUMBER}) (?P<op>{OPERATOR}) (?P<b>{NUMBER})",
+            rf"(?:what(?:'s| is) |calculate )?(?:the )?(?P<op>square root of) (?P<b>{NUMBER})",
+            rf"(?:what(?:'s| is) |calculate )?(?P<b>{NUMBER}) (?P<op>squared)",
+        ], calculate),
+        PatternIntent("unit_conversion", [
+            rf"(?:convert |what(?:'s| is) )?(?P<amount>{AMOUNT}) (?P<src>{UNIT}) (?:to|in|into) (?P<dst>{UNIT})",
+            rf"how many (?P<dst>{UNIT}) (?:are )?(?:in|is|are|make) (?P<amount>{AMOUNT}) (?P<src>{UNIT})",
+        ], convert_units),
+        PatternIntent("timer", [
+            rf"(?:set |start )?(?:a |an )?timer for (?P<amount>{AMOUNT}) {TIME_UNIT}",
+            rf"(?:set |start )?(?:a |an )?(?P<amount>{NUMBER}) {TIME_UNIT} timer",
+        ], set_timer),
+        PatternIntent("repeat", [
+            r"(?:can you |could you )?(?:repeat|say) (?:that|it|yourself)(?: again)?",
+            r"say that again",
+            r"what did you (?:just )?say",
+            r"come again",
+        ], repeat_last),
+    ], threshold=threshold)
@@ -1,18 +1,18 @@
+import os
 import sys
 import threading
-import queue
-import speech_recognition as sr
-import subprocess
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
 import time
-from elevenlabs.client import ElevenLabs
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QLabel, 
-                           QTextEdit, QPushButton, QWidget, QHBoxLayout)
+                           QListView, QPushButton, QWidget, QHBoxLayout)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QPoint
-from PyQt5.QtGui import QFont, QColor, QPalette, QTextCursor, QMouseEvent
-from easter_eggs import get_easter_egg_response
+from PyQt5.QtGui import QFont, QColor, QPalette, QMouseEvent
+from transcript import TranscriptArchive, TranscriptDelegate, TranscriptModel
+
+# Turns that scroll out of the on-screen transcript are appended here
+TRANSCRIPT_DIR = os.path.join(
+    os.getenv("ARIA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "aria")),
+    "transcripts",
+)
 
 class SignalEmitter(QObject):
     update_text_signal = pyqtSignal(str, bool)
@@ -20,22 +20,55 @@ class SignalEmitter(QObject):
     thinking_signal = pyqtSignal(bool)
     transcribe_signal = pyqtSignal(str)
     response_ready_signal = pyqtSignal(str)
+    response_delta_signal = pyqtSignal(str)
+    status_signal = pyqtSignal(str)
+    ready_signal = pyqtSignal(bool, str)
 
 class AriaAssistantUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.signal_emitter = SignalEmitter()
-        self.signal_emitter.update_text_signal.connect(self.update_chat)
         self.signal_emitter.transcribe_signal.connect(self.update_transcription)
         self.signal_emitter.thinking_signal.connect(self.update_thinking_indicator)
-        self.signal_emitter.response_ready_signal.connect(self.display_response)
+        self.signal_emitter.status_signal.connect(self.update_status)
+        self.signal_emitter.ready_signal.connect(self.on_assistant_ready)
         
         # Dragging variables
         self._dragging = False
         self._drag_start_position = QPoint()
         
         self.initUI()
-        self.assistant = SimpleVoiceAssistant(self.signal_emitter)
+        
+        # The transcript model is thread-safe and batches its own repaints, so
+        # these run on the emitting thread instead of posting an event per token
+        self.signal_emitter.update_text_signal.connect(self.transcript.add_message, Qt.DirectConnection)
+        self.signal_emitter.response_delta_signal.connect(self.transcript.append_delta, Qt.DirectConnection)
+        self.signal_emitter.response_ready_signal.connect(self.transcript.finish_response, Qt.DirectConnection)
+        
+        # The SDKs, API clients and audio devices take seconds to load, so they
+        # come up on a background thread once the window has painted
+        self.assistant = None
+        self._started_at = time.perf_counter()
+        QTimer.singleShot(0, self.load_assistant)
+
+    def load_assistant(self):
+        threading.Thread(target=self._load_assistant, daemon=True).start()
+
+    def _load_assistant(self):
+        try:
+            self.signal_emitter.status_signal.emit("Loading speech and language services...")
+            # Deferred import: this is where openai, elevenlabs and speech_recognition load
+            from assistant import SimpleVoiceAssistant
+            assistant = SimpleVoiceAssistant(self.signal_emitter)
+            self.signal_emitter.status_signal.emit("Opening audio devices...")
+            assistant.open_devices()
+            assistant.warm_up()
+        except Exception as e:
+            print(f"Startup error: {e}")
+            self.signal_emitter.ready_signal.emit(False, str(e))
+            return
+        self.assistant = assistant
+        self.signal_emitter.ready_signal.emit(True, f"Ready in {time.perf_counter() - self._started_at:.1f} s")
 
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
@@ -91,11 +124,23 @@ class AriaAssistantUI(QMainWindow):
         """)
         main_layout.addWidget(self.transcription_label)
         
-        # Chat Area
-        self.chat_area = QTextEdit()
-        self.chat_area.setReadOnly(True)
+        # Chat Area: a capped window over the transcript, older turns go to disk
+        archive = TranscriptArchive(os.path.join(TRANSCRIPT_DIR, time.strftime("%Y%m%d-%H%M%S") + ".jsonl"))
+        self.transcript = TranscriptModel(max_messages=500, archive=archive, parent=self)
+        self.chat_area = QListView()
+        self.chat_area.setModel(self.transcript)
+        self.chat_area.setItemDelegate(TranscriptDelegate(parent=self.chat_area))
+        self.chat_area.setWordWrap(True)
+        self.chat_area.setSelectionMode(QListView.NoSelection)
+        self.chat_area.setFocusPolicy(Qt.NoFocus)
+        self.chat_area.setVerticalScrollMode(QListView.ScrollPerPixel)
+        # Keep following new lines unless the user has scrolled up to read
+        self._follow_transcript = True
+        scrollbar = self.chat_area.verticalScrollBar()
+        scrollbar.valueChanged.connect(self.on_transcript_scrolled)
+        scrollbar.rangeChanged.connect(self.on_transcript_grown)
         self.chat_area.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: #001020;
                 color: #00FFFF;
                 font-family: 'Consolas', 'Courier New', monospace;
@@ -144,8 +189,19 @@ class AriaAssistantUI(QMainWindow):
         }
         """)
         self.listen_btn.clicked.connect(self.start_listening)
+        self.listen_btn.setEnabled(False)
         main_layout.addWidget(self.listen_btn)
         
+        # Startup progress; the button stays disabled until the assistant is ready
+        self.status_label = QLabel("Starting up...")
+        self.status_label.setStyleSheet("""
+            color: #5F9EA0;
+            font-size: 12px;
+            padding: 2px 10px;
+        """)
+        self.status_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(self.status_label)
+        
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
         
@@ -168,225 +224,36 @@ class AriaAssistantUI(QMainWindow):
         else:
             self.thinking_label.hide()
 
-    def display_response(self, text):
-        self.update_chat(text, False)
-
     def update_transcription(self, text):
         self.transcription_label.setText(f"Transcription: {text}")
 
+    def update_status(self, text):
+        self.status_label.setText(text)
+
+    def on_assistant_ready(self, ok, detail):
+        if ok:
+            self.status_label.setText(detail)
+            self.listen_btn.setEnabled(True)
+        else:
+            self.status_label.setText(f"Startup failed: {detail}")
+
     def update_listening_indicator(self, is_listening):
         # Removed as requested
         pass
 
     def start_listening(self):
+        if self.assistant is None:
+            return
         self.listen_btn.setEnabled(False)
         threading.Thread(target=self.assistant.run, daemon=True).start()
         QTimer.singleShot(5000, lambda: self.listen_btn.setEnabled(True))
 
-    def update_chat(self, text, is_user=True):
-        cursor = self.chat_area.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.chat_area.setTextCursor(cursor)
-        
-        prefix = "USER >>> " if is_user else "ARIA >>> "
-        color = "#00BFFF" if is_user else "#00FFFF"
-        
-        self.chat_area.setTextColor(QColor(color))
-        self.chat_area.insertPlainText(f"{prefix}{text}\n")
-        self.chat_area.verticalScrollBar().setValue(
-            self.chat_area.verticalScrollBar().maximum()
-        )
-
-class SimpleVoiceAssistant:
-    def __init__(self, signal_emitter):
-        self.signal_emitter = signal_emitter
-        load_dotenv()
-        
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.eleven = ElevenLabs(api_key=os.getenv('ELEVENLABS_API_KEY'))
-        
-        self.recognizer = sr.Recognizer()
-        self.recognizer.dynamic_energy_threshold = True
-        self.recognizer.energy_threshold = 300
-        self.recognizer.pause_threshold = 0.8
-        self.recognizer.phrase_threshold = 0.3
-        self.recognizer.non_speaking_duration = 0.5
-        
-        self.response_cache = {}
-        self.is_speaking = False
-        self.is_listening = False
-        self.stop_listening = threading.Event()
-        
-        # Voice settings
-        self.voice_settings = {
-            "voice": "Glinda",
-            "model": "eleven_monolingual_v1",
-            "voice_settings": {
-                "stability": 0.95,
-                "similarity_boost": 0.75,
-                "style": 0.0,
-                "use_speaker_boost": True,
-            }
-        }
+    def on_transcript_scrolled(self, value):
+        self._follow_transcript = value >= self.chat_area.verticalScrollBar().maximum() - 4
 
-    def get_gpt_response(self, text):
-        self.signal_emitter.thinking_signal.emit(True)
-        
-        if text in self.response_cache:
-            return self.response_cache[text]
-
-        try:
-            full_response = ""
-            for chunk in self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are Aria, a concise AI assistant. Always respond in 1-2 sentences maximum, even for complex questions. Never use lists or bullet points."},
-                    {"role": "user", "content": text}
-                ],
-                stream=True,
-                max_tokens=100  # Limit response length
-            ):
-                if chunk.choices[0].delta.content:
-                    full_response += chunk.choices[0].delta.content
-            
-            self.response_cache[text] = full_response
-            return full_response
-        
-        except Exception as e:
-            print(f"Error: {e}")
-            return "System error. Unable to process request."
-
-    def speak(self, text):
-        if self.is_speaking:
-            return
-        
-        try:
-            self.is_speaking = True
-            self.is_listening = False
-            
-            self.signal_emitter.thinking_signal.emit(True)
-            self.signal_emitter.listening_signal.emit(False)
-            
-            def generate_and_play():
-                try:
-                    audio = self.eleven.generate(text=text, **self.voice_settings)
-                    
-                    with open("temp_audio.mp3", "wb") as f:
-                        for chunk in audio:
-                            f.write(chunk)
-                    
-                    self.signal_emitter.thinking_signal.emit(False)
-                    self.signal_emitter.response_ready_signal.emit(text)
-                    subprocess.run(['afplay', 'temp_audio.mp3'], check=True)
-                    
-                except Exception as e:
-                    print(f"ElevenLabs audio generation/playback error: {e}")
-                    # Emit the text response even if audio fails
-                    self.signal_emitter.response_ready_signal.emit(text)
-                
-                finally:
-                    # Clean up the temporary audio file
-                    try:
-                        if os.path.exists("temp_audio.mp3"):
-                            os.remove("temp_audio.mp3")
-                    except Exception as e:
-                        print(f"Error removing temporary audio file: {e}")
-                    
-                    self.signal_emitter.thinking_signal.emit(False)
-                    self.is_speaking = False
-                    self.is_listening = False
-                    self.signal_emitter.listening_signal.emit(True)
-            
-            threading.Thread(target=generate_and_play, daemon=True).start()
-        
-        except Exception as e:
-            print(f"Speaking error: {e}")
-            self.signal_emitter.thinking_signal.emit(False)
-            self.is_speaking = False
-            self.is_listening = False
-            self.signal_emitter.listening_signal.emit(True)
-            
-            threading.Thread(target=generate_and_play, daemon=True).start()
-        
-        except Exception as e:
-            print(f"Speaking error: {e}")
-            self.signal_emitter.thinking_signal.emit(False)
-            self.is_speaking = False
-            self.is_listening = False
-            self.signal_emitter.listening_signal.emit(True)
-
-    def run(self):
-        self.signal_emitter.listening_signal.emit(True)
-        self.speak("Initializing Aria system. Ready for input.")
-        self.stop_listening.clear()
-        
-        while not self.stop_listening.is_set():
-            try:
-                with sr.Microphone() as source:
-                    self.recognizer.adjust_for_ambient_noise(source, duration=1.0)
-                    
-                    while self.is_speaking:
-                        time.sleep(0.1)
-                    
-                    self.is_listening = True
-                    self.signal_emitter.listening_signal.emit(True)
-                    
-                    try:
-                        audio = self.recognizer.listen(
-                            source,
-                            timeout=10,
-                            phrase_time_limit=10
-                        )
-                        
-                        def process_audio():
-                            try:
-                                if self.is_speaking:
-                                    return
-                                
-                                text = None
-                                for _ in range(3):
-                                    try:
-                                        text = self.recognizer.recognize_google(audio).lower()
-                                        self.signal_emitter.transcribe_signal.emit(text)
-                                        break
-                                    except sr.UnknownValueError:
-                                        time.sleep(0.1)
-                                
-                                if not text:
-                                    print("Could not understand audio after multiple attempts")
-                                    return
-                                
-                                self.signal_emitter.update_text_signal.emit(text, True)
-                                
-                                if text == "exit":
-                                    self.speak("Shutting down. Goodbye.")
-                                    self.stop_listening.set()
-                                    return
-                                
-                                # Check for easter egg responses first
-                                easter_egg = get_easter_egg_response(text)
-                                if easter_egg:
-                                    self.speak(easter_egg)
-                                    return
-                                    
-                                # If no easter egg found, get GPT response
-                                response = self.get_gpt_response(text)
-                                self.speak(response)
-                            
-                            except Exception as e:
-                                print(f"Processing error: {e}")
-                            finally:
-                                self.is_listening = False
-                        
-                        threading.Thread(target=process_audio, daemon=True).start()
-                    
-                    except sr.WaitTimeoutError:
-                        self.is_listening = False
-            
-            except Exception as e:
-                print(f"Listening error: {e}")
-                self.is_listening = False
-                time.sleep(0.1)
+    def on_transcript_grown(self, minimum, maximum):
+        if self._follow_transcript:
+            self.chat_area.verticalScrollBar().setValue(maximum)
 
 def main():
     app = QApplication(sys.argv)
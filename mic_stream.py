@@ -0,0 +1,285 @@
+# mic_stream.py
+# One persistent microphone capture for the whole session, with background calibration
+import audioop
+import collections
+import threading
+import time
+
+import speech_recognition as sr
+
+from vad import pcm_to_float
+
+
+class _BufferedStream:
+    """The file-like object sr.Recognizer.listen() reads chunks from."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def read(self, size):
+        return self.source.read_chunk()
+
+    def close(self):
+        pass
+
+
+class BufferedMicrophone(sr.AudioSource):
+    """
+    A microphone that is opened once and captured continuously.
+
+    A background thread reads the device into a ring buffer of recent
+    chunks, so nothing is lost while the assistant is busy and there is no
+    device open/close between turns. Chunks whose energy is below the
+    current threshold are treated as non-speech and used to track the
+    ambient noise level, updating recognizer.energy_threshold the same way
+    speech_recognition's dynamic threshold does. That replaces the one
+    second adjust_for_ambient_noise() call before every turn.
+
+    The object is an sr.AudioSource, so it can be passed straight to
+    recognizer.listen().
+
+    Args:
+        recognizer (sr.Recognizer): Recognizer whose threshold is maintained
+        device_index (int or None): PyAudio input device, None for default
+        sample_rate (int or None): Capture rate, None for the device default
+        chunk_size (int): Frames per chunk read from the device
+        buffer_seconds (float): How much recent audio the ring buffer holds
+        warmup_seconds (float): Initial period with fast threshold convergence
+        min_energy_threshold (float): Floor for the calibrated threshold, so
+            digital silence cannot drive it to zero
+
+    If the device keeps failing (it was unplugged, say), capture gives up
+    after max_read_failures consecutive errors: failed becomes True and
+    read_chunk() returns b"" once the buffered audio is used up.
+    """
+
+    max_read_failures = 50
+    retry_seconds = 0.1
+
+    def __init__(self, recognizer, device_index=None, sample_rate=None, chunk_size=1024,
+                 buffer_seconds=30.0, warmup_seconds=0.5, min_energy_threshold=100):
+        self.microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate,
+                                        chunk_size=chunk_size)
+        self._setup(recognizer, self.microphone.SAMPLE_RATE, self.microphone.SAMPLE_WIDTH,
+                    self.microphone.CHUNK, buffer_seconds, warmup_seconds, min_energy_threshold)
+
+    def _setup(self, recognizer, sample_rate, sample_width, chunk_size, buffer_seconds, warmup_seconds,
+               min_energy_threshold=100):
+        self.recognizer = recognizer
+        self.min_energy_threshold = min_energy_threshold
+        self.buffer_seconds = buffer_seconds
+        self.warmup_seconds = warmup_seconds
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = sample_width
+        self.CHUNK = chunk_size
+        self.stream = None
+        self._chunks = collections.deque()
+        self._captured_at = collections.deque()
+        self._last_read_at = None
+        # Set by listen(): when the last utterance's speech actually stopped
+        # (time.perf_counter()), before the endpointer's hangover; None if unknown
+        self.speech_ended_at = None
+        self._written = 0
+        self._read_index = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self.failed = False
+        self._thread = None
+        # Called from the capture thread as listener(chunk, index, sample_width, seconds)
+        self.listeners = []
+        # The background calibration replaces listen()'s own adjustment
+        recognizer.dynamic_energy_threshold = False
+
+    @property
+    def seconds_per_chunk(self):
+        return self.CHUNK / self.SAMPLE_RATE
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    # Device hooks; subclasses override these to capture from somewhere else
+
+    def _open_device(self):
+        self.microphone.__enter__()
+
+    def _read_device(self):
+        return self.microphone.stream.read(self.CHUNK)
+
+    def _close_device(self):
+        self.microphone.__exit__(None, None, None)
+
+    def start(self):
+        if self._running:
+            return
+        self._open_device()
+        self._chunks = collections.deque(maxlen=max(1, int(self.buffer_seconds / self.seconds_per_chunk)))
+        self._captured_at = collections.deque(maxlen=self._chunks.maxlen)
+        self._running = True
+        self.failed = False
+        self.stream = _BufferedStream(self)
+        self._thread = threading.Thread(target=self._capture, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
+        self._close_device()
+        self.stream = None
+
+    def _capture(self):
+        warmup_chunks = int(self.warmup_seconds / self.seconds_per_chunk)
+        captured = 0
+        failures = 0
+        while self._running:
+            try:
+                data = self._read_device()
+            except Exception as e:
+                failures += 1
+                if failures == 1:
+                    print(f"Microphone capture error: {e}")
+                with self._cond:
+                    if failures >= self.max_read_failures:
+                        print(f"Microphone capture stopped after {failures} failed reads: {e}")
+                        self.failed = True
+                        self._cond.notify_all()
+                        return
+                    # Back off rather than spin on a missing device; stop() wakes this early
+                    self._cond.wait(self.retry_seconds)
+                continue
+            failures = 0
+            with self._cond:
+                self._chunks.append(data)
+                self._captured_at.append(time.perf_counter())
+                index = self._written
+                self._written += 1
+                self._cond.notify_all()
+            for listener in self.listeners:
+                try:
+                    listener(data, index, self.SAMPLE_WIDTH, self.seconds_per_chunk)
+                except Exception as e:
+                    print(f"Microphone listener error: {e}")
+            captured += 1
+            self._calibrate(data, fast=captured <= warmup_chunks)
+
+    def _calibrate(self, data, fast=False):
+        energy = audioop.rms(data, self.SAMPLE_WIDTH)
+        recognizer = self.recognizer
+        if not fast and energy > recognizer.energy_threshold:
+            return  # Probably speech, which must not raise the noise floor
+        damping = 0.5 if fast else recognizer.dynamic_energy_adjustment_damping ** self.seconds_per_chunk
+        target = energy * recognizer.dynamic_energy_ratio
+        recognizer.energy_threshold = max(self.min_energy_threshold,
+                                          recognizer.energy_threshold * damping + target * (1 - damping))
+
+    def read_chunk(self):
+        """Return the next unread chunk, blocking until one is captured."""
+        with self._cond:
+            while self._read_index >= self._written and self._running and not self.failed:
+                self._cond.wait()
+            if not self._running or self._read_index >= self._written:
+                return b""
+            oldest = self._written - len(self._chunks)
+            if self._read_index < oldest:
+                # The reader fell behind the ring buffer; skip what was dropped
+                self._read_index = oldest
+            chunk = self._chunks[self._read_index - oldest]
+            self._last_read_at = self._captured_at[self._read_index - oldest]
+            self._read_index += 1
+            return chunk
+
+    def flush(self, keep_seconds=0.0):
+        """Skip buffered audio, keeping only the most recent keep_seconds as pre-roll."""
+        keep = int(keep_seconds / self.seconds_per_chunk)
+        with self._cond:
+            self._read_index = max(self._read_index, self._written - keep)
+
+    @property
+    def position(self):
+        """Index of the next chunk read_chunk() will return, as passed to listeners."""
+        with self._cond:
+            return self._read_index
+
+    def seek(self, index, pre_roll_seconds=0.0):
+        """Make the next read start at chunk index, minus pre_roll_seconds of lead-in."""
+        back = int(pre_roll_seconds / self.seconds_per_chunk)
+        with self._cond:
+            self._read_index = max(0, index - back)
+
+    def _speech_end_time(self, endpointer, timeline):
+        # Capture time of the chunk holding the last speech frame, less the audio after it
+        speech_end = endpointer.speech_end if endpointer.speech_end is not None else endpointer.last_speech
+        if speech_end is None:
+            return None
+        for chunk_end, captured_at in timeline:
+            if chunk_end >= speech_end and captured_at is not None:
+                return captured_at - (chunk_end - speech_end)
+        return None
+
+    def listen(self, endpointer, timeout=None, phrase_time_limit=None, pre_roll_seconds=0.3,
+               on_pause=None, pause_fraction=0.5):
+        """
+        Capture one utterance, using a VAD endpointer instead of pause_threshold.
+
+        Args:
+            endpointer (vad.Endpointer): Decides when speech starts and ends
+            timeout (float or None): Seconds to wait for speech to start
+            phrase_time_limit (float or None): Maximum utterance length
+            pre_roll_seconds (float): Audio kept from before the detected onset
+            on_pause (callable or None): Called with the sr.AudioData so far
+                once per pause that gets pause_fraction of the way to ending
+                the utterance; runs on the listening thread, so keep it short
+            pause_fraction (float): Share of the hangover that counts as a pause
+
+        Returns:
+            sr.AudioData: The utterance; speech_ended_at is set to when its
+            speech stopped
+
+        Raises:
+            sr.WaitTimeoutError: If no speech starts within timeout
+        """
+        endpointer.reset()
+        self.speech_ended_at = None
+        # (endpointer time at the end of the chunk, when the chunk was captured)
+        timeline = []
+        pre_roll = collections.deque(maxlen=max(1, int(pre_roll_seconds / self.seconds_per_chunk) + 1))
+        chunks = []
+        waited = 0.0
+        spoken = 0.0
+        paused = False
+        while True:
+            chunk = self.read_chunk()
+            if not chunk:
+                raise sr.WaitTimeoutError("Microphone stopped")
+            ended = endpointer.feed(pcm_to_float(chunk, self.SAMPLE_WIDTH), self.SAMPLE_RATE)
+            timeline.append((endpointer.elapsed, self._last_read_at))
+            if not endpointer.started:
+                pre_roll.append(chunk)
+                waited += self.seconds_per_chunk
+                if timeout and waited > timeout:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                continue
+            if not chunks:
+                pre_roll.append(chunk)
+                chunks.extend(pre_roll)
+            else:
+                chunks.append(chunk)
+            spoken += self.seconds_per_chunk
+            if ended or (phrase_time_limit and spoken > phrase_time_limit):
+                self.speech_ended_at = self._speech_end_time(endpointer, timeline)
+                break
+            if on_pause is not None:
+                progress = endpointer.pause_progress
+                if progress >= pause_fraction and not paused:
+                    paused = True
+                    on_pause(sr.AudioData(b"".join(chunks), self.SAMPLE_RATE, self.SAMPLE_WIDTH))
+                elif progress == 0.0:
+                    paused = False
+        return sr.AudioData(b"".join(chunks), self.SAMPLE_RATE, self.SAMPLE_WIDTH)
@@ -0,0 +1,113 @@
+# phrase_matcher.py
+# Word-level Aho-Corasick matcher for looking up many trigger phrases at once
+import re
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens; phrases only match on whole words."""
+    return _TOKEN.findall(text.lower())
+
+
+class PhraseMatcher:
+    """
+    Finds the best trigger phrase contained in a piece of text.
+
+    Phrases are compiled into an Aho-Corasick automaton over word tokens,
+    so a lookup is a single pass over the input regardless of how many
+    phrases are loaded, and "marco" never matches inside "marcopolo".
+    When several phrases occur, the one with the most words wins, then
+    the one with more characters, then the earliest in the text, then the
+    one added first, so the result never depends on dict ordering.
+
+    Args:
+        phrases (dict or None): Optional mapping of phrase -> value to add
+    """
+
+    def __init__(self, phrases=None):
+        self._goto = [{}]
+        self._fail = [0]
+        # Best (priority, phrase_index) ending at each node, including via fail links
+        self._best = [None]
+        self._phrases = []
+        self._values = []
+        self._compiled = True
+        if phrases:
+            for phrase, value in phrases.items():
+                self.add(phrase, value)
+
+    def __len__(self):
+        return len(self._phrases)
+
+    def add(self, phrase, value):
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            node = nxt
+        index = len(self._phrases)
+        self._phrases.append(tokens)
+        self._values.append(value)
+        # More words, then more characters; earlier additions win ties
+        candidate = ((len(tokens), sum(map(len, tokens)), -index), index)
+        if self._best[node] is None or candidate[0] > self._best[node][0]:
+            self._best[node] = candidate
+        self._compiled = False
+
+    def compile(self):
+        """Build failure links; called automatically before the first match."""
+        queue = []
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None
+                                              or inherited[0] > self._best[child][0]):
+                    self._best[child] = inherited
+        self._compiled = True
+
+    def search(self, text):
+        """
+        Return (phrase, value) for the highest-priority phrase in text, or None.
+        """
+        if not self._compiled:
+            self.compile()
+        goto, fail, best_at = self._goto, self._fail, self._best
+        best = None
+        best_start = 0
+        node = 0
+        for position, token in enumerate(tokenize(text)):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            found = best_at[node]
+            if found is None:
+                continue
+            start = position + 1 - found[0][0]
+            if (best is None or found[0][:2] > best[0][:2]
+                    or (found[0][:2] == best[0][:2] and start < best_start)):
+                best = found
+                best_start = start
+        if best is None:
+            return None
+        index = best[1]
+        return " ".join(self._phrases[index]), self._values[index]
@@ -0,0 +1,249 @@
+# response_cache.py
+# Bounded, normalized LLM response cache with single-flight request coalescing
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_key(text):
+    """
+    Reduce a transcript to the form used as a cache key.
+
+    Lowercases, drops punctuation and collapses whitespace so that
+    "What time is it?" and "what  time is it" share an entry.
+    """
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class _Flight:
+    """A completion in progress that identical requests can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def result(self, timeout=None):
+        """
+        Returns:
+            str or None: The leader's value, or None if the leader gave up
+            without an answer (see ResponseCache.release); claim() again
+
+        Raises:
+            TimeoutError: If nothing happened within timeout
+            Exception: The leader's error, if its request failed
+        """
+        if not self.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for in-flight response")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class ResponseCache:
+    """
+    LRU cache of LLM responses with TTL expiry and optional persistence.
+
+    Entries are evicted least-recently-used first when either max_entries or
+    max_bytes (approximate memory of keys plus values) is exceeded. Requests
+    for a key that is already being computed are coalesced: only the first
+    caller (the leader) runs the completion, and the others block until it
+    resolves and share its result. Coalesced callers are counted in
+    stats["coalesced"], not as misses.
+
+    New entries are written to path at most once per save_delay seconds;
+    call save() on shutdown to write any still pending.
+
+    Args:
+        max_entries (int): Maximum number of cached responses
+        max_bytes (int): Memory budget for cached keys and values
+        ttl (float or None): Seconds an entry stays valid, None for forever
+        path (str or None): JSON file to load from and save to
+        save_delay (float): Seconds to batch new entries before saving
+    """
+
+    def __init__(self, max_entries=512, max_bytes=1024 * 1024, ttl=24 * 3600, path=None, save_delay=5.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self.save_delay = save_delay
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "coalesced": 0}
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._save_timer = None
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    @staticmethod
+    def _size(key, value):
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text):
+        key = normalize_key(text)
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key):
+        value = self._lookup_locked(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def _lookup_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            self._remove_locked(key)
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, text, value):
+        key = normalize_key(text)
+        with self._lock:
+            self._put_locked(key, value, time.time())
+        self._schedule_save()
+
+    def _put_locked(self, key, value, stored_at):
+        if key in self._entries:
+            self._remove_locked(key)
+        self._entries[key] = (value, stored_at)
+        self.total_bytes += self._size(key, value)
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self.total_bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove_locked(oldest)
+            self.stats["evictions"] += 1
+
+    def _remove_locked(self, key):
+        value, _ = self._entries.pop(key)
+        self.total_bytes -= self._size(key, value)
+
+    def claim(self, text):
+        """
+        Look up text, or register the caller as the one computing it.
+
+        Returns:
+            tuple: (value, None) on a hit, (None, None) if the caller is now
+            the leader and must call resolve() or fail(), or (None, flight)
+            if another caller is already computing it; flight.result() blocks
+            until that finishes.
+        """
+        key = normalize_key(text)
+        with self._lock:
+            value = self._lookup_locked(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                return value, None
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats["coalesced"] += 1
+                return None, flight
+            self.stats["misses"] += 1
+            self._flights[key] = _Flight()
+            return None, None
+
+    def resolve(self, text, value):
+        """Store the leader's result and release any coalesced waiters."""
+        key = normalize_key(text)
+        with self._lock:
+            self._put_locked(key, value, time.time())
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.value = value
+            flight.done.set()
+        self._schedule_save()
+
+    def release(self, text):
+        """
+        Abandon the leader's computation without an error, e.g. when its turn
+        is cancelled. Waiters get None from result() and claim() again, so one
+        of them becomes the new leader; nothing is cached.
+        """
+        key = normalize_key(text)
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.done.set()
+
+    def fail(self, text, error):
+        """Abandon the leader's computation; waiters see the error and nothing is cached."""
+        key = normalize_key(text)
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.error = error
+            flight.done.set()
+
+    def get_or_compute(self, text, compute):
+        while True:
+            value, flight = self.claim(text)
+            if value is not None:
+                return value
+            if flight is None:
+                break
+            value = flight.result()
+            if value is not None:
+                return value
+        try:
+            value = compute(text)
+        except Exception as e:
+            self.fail(text, e)
+            raise
+        self.resolve(text, value)
+        return value
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for key, value, stored_at in data.get("entries", []):
+                if self.ttl is None or now - stored_at <= self.ttl:
+                    self._put_locked(key, value, stored_at)
+
+    def _schedule_save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            entries = [[key, value, stored_at] for key, (value, stored_at) in self._entries.items()]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Response cache save error: {e}")
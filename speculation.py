@@ -0,0 +1,268 @@
+# speculation.py
+# Start the LLM on a likely-final transcript while the endpointer is still deciding
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import normalize_key
+from turn_scheduler import Turn
+
+
+class SpeculationStats:
+    """Counters for tuning speculation: how often it pays off and what it costs."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.committed = 0
+        self.mismatched = 0
+        self.abandoned = 0
+        self.late = 0
+        self.skipped = 0
+        self.failed = 0
+        self.wasted_requests = 0
+        self.wasted_tokens = 0
+        self.saved_seconds = []
+        self._lock = threading.Lock()
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def record_commit(self, saved):
+        with self._lock:
+            self.committed += 1
+            self.saved_seconds.append(saved)
+
+    def record_waste(self, tokens):
+        with self._lock:
+            self.wasted_requests += 1
+            self.wasted_tokens += tokens
+
+    def summary(self):
+        with self._lock:
+            saved = sorted(self.saved_seconds)
+            return {
+                "attempts": self.attempts,
+                "committed": self.committed,
+                "mismatched": self.mismatched,
+                "abandoned": self.abandoned,
+                "late": self.late,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "hit_rate": round(self.committed / self.attempts, 3) if self.attempts else None,
+                "median_saved_ms": round(saved[len(saved) // 2] * 1000, 1) if saved else None,
+                "total_saved_s": round(sum(saved), 2),
+                "wasted_requests": self.wasted_requests,
+                "wasted_tokens": self.wasted_tokens,
+            }
+
+
+class Speculation:
+    """
+    One speculative reply, buffered so a matching turn can replay it.
+
+    turn is a private Turn used only as the cancellation handle passed to
+    the LLM stream; cancelling it stops the stream at the next token.
+    utterance is the final audio of the utterance it was started for, set
+    by Speculator.attach() once capture ends.
+    """
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.utterance = None
+        self.text = None
+        self.key = None
+        self.turn = Turn(audio=audio)
+        self.llm_started_at = None
+        self.outcome = None
+        self.waste_recorded = False
+        self.tokens = []
+        self.done = False
+        self._cond = threading.Condition()
+
+    @property
+    def is_cancelled(self):
+        return self.turn.is_cancelled
+
+    def cancel(self):
+        self.turn.cancel()
+        with self._cond:
+            self._cond.notify_all()
+
+    def append(self, token):
+        with self._cond:
+            self.tokens.append(token)
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+
+    def replay(self):
+        """Yield the tokens received so far, then the rest as they arrive."""
+        sent = 0
+        while True:
+            with self._cond:
+                while sent == len(self.tokens) and not self.done and not self.is_cancelled:
+                    self._cond.wait()
+                if sent == len(self.tokens):
+                    return
+                tokens = self.tokens[sent:]
+                sent = len(self.tokens)
+            yield from tokens
+
+
+class Speculator:
+    """
+    Runs the LLM ahead of the final transcript.
+
+    When the endpointer sees a pause, speculate() recognizes the audio
+    captured so far and starts the reply on a background thread, before
+    the hangover confirms the turn is over. When the final transcript
+    arrives, take() commits the speculation if both transcripts normalize
+    to the same text (see response_cache.normalize_key) and replays its
+    buffered reply; otherwise the speculation is cancelled and the caller
+    makes the request as usual. A newer pause supersedes an older one.
+    attach() ties the speculation to the utterance it was made from, so a
+    turn only ever takes or discards its own.
+
+    Every pause costs an extra recognition, and a wrong guess costs the
+    tokens generated before it is cancelled, so stats tracks both sides.
+
+    Args:
+        recognize (callable): sr.AudioData -> transcript str or None
+        stream (callable): (text, turn) -> iterator of reply fragments
+        should_speculate (callable or None): text -> bool; False for
+            transcripts that will not be answered by the LLM
+        max_workers (int): Speculations allowed to run at once
+    """
+
+    def __init__(self, recognize, stream, should_speculate=None, max_workers=2):
+        self.recognize = recognize
+        self.stream = stream
+        self.should_speculate = should_speculate
+        self.stats = SpeculationStats()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._current = None
+        self._lock = threading.Lock()
+
+    def speculate(self, audio):
+        """Start a speculation on a partial utterance. Safe to call from the capture thread."""
+        speculation = Speculation(audio)
+        with self._lock:
+            stale, self._current = self._current, speculation
+        if stale is not None:
+            self._discard(stale, "abandoned")
+        self.stats.record("attempts")
+        self._pool.submit(self._run, speculation)
+
+    def _run(self, speculation):
+        try:
+            text = self.recognize(speculation.audio)
+        except Exception as e:
+            print(f"Speculative recognition error: {e}")
+            text = None
+        if speculation.is_cancelled:
+            speculation.finish()
+            return
+        if not text or (self.should_speculate is not None and not self.should_speculate(text)):
+            speculation.finish()
+            self._discard(speculation, "skipped")
+            return
+        speculation.text = text
+        speculation.key = normalize_key(text)
+        speculation.llm_started_at = time.perf_counter()
+        try:
+            for token in self.stream(text, speculation.turn):
+                if speculation.is_cancelled:
+                    break
+                speculation.append(token)
+        except Exception as e:
+            print(f"Speculative request error: {e}")
+        finally:
+            speculation.finish()
+            if speculation.outcome not in (None, "committed"):
+                self._record_waste(speculation)
+
+    def _record_waste(self, speculation):
+        # Called when the stream ends after a discard, or by a discard after the stream ended
+        if speculation.llm_started_at is None:
+            return
+        with self._lock:
+            if speculation.waste_recorded:
+                return
+            speculation.waste_recorded = True
+        self.stats.record_waste(len(speculation.tokens))
+
+    def _discard(self, speculation, outcome):
+        with self._lock:
+            if speculation.outcome is not None:
+                return
+            speculation.outcome = outcome
+            if self._current is speculation:
+                self._current = None
+        self.stats.record(outcome)
+        speculation.cancel()
+        if speculation.done:
+            # The reply finished before it was rejected, so _run() may not count it
+            self._record_waste(speculation)
+
+    def attach(self, audio):
+        """Tie the running speculation to the utterance's final audio, as submitted in its Turn."""
+        with self._lock:
+            if self._current is not None and self._current.utterance is None:
+                self._current.utterance = audio
+
+    def _speculation_for(self, audio):
+        with self._lock:
+            speculation = self._current
+        if speculation is None or audio is None or speculation.utterance is not audio:
+            # None yet, or made during a later utterance that this turn must not touch
+            return None
+        return speculation
+
+    def take(self, text, turn):
+        """
+        Claim the speculative reply for a final transcript.
+
+        Returns:
+            iterator of str or None: The reply stream if the speculation
+            matched, None if the caller should make the request itself
+        """
+        speculation = self._speculation_for(turn.audio)
+        if speculation is None:
+            return None
+        if speculation.key is None:
+            # Still recognizing, or nothing worth speculating on
+            self._discard(speculation, "late")
+            return None
+        if speculation.key != normalize_key(text):
+            self._discard(speculation, "mismatched")
+            return None
+        if speculation.done and not speculation.tokens:
+            # The speculative request failed; let the caller retry it for real
+            self._discard(speculation, "failed")
+            return None
+        with self._lock:
+            if speculation.outcome is not None:
+                return None
+            speculation.outcome = "committed"
+            self._current = None
+        self.stats.record_commit(time.perf_counter() - speculation.llm_started_at)
+        turn.on_cancel(speculation.cancel)
+        return speculation.replay()
+
+    def discard(self, audio=None):
+        """Abandon the speculation made for the utterance audio, or whichever is running when None."""
+        if audio is None:
+            with self._lock:
+                speculation = self._current
+        else:
+            speculation = self._speculation_for(audio)
+        if speculation is not None:
+            self._discard(speculation, "abandoned")
+
+    def shutdown(self):
+        self.discard()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,203 @@
+# speech_pipeline.py
+# Sentence-level streaming from LLM tokens to synthesized, ordered playback
+import queue
+import re
+import threading
+
+# A sentence ends at terminal punctuation (optionally followed by closing
+# quotes/brackets) that is followed by whitespace. Requiring the whitespace
+# keeps "3.5" from being split while it is still streaming.
+SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+')
+# A single "." after one of these is not a sentence end: "Dr. Smith",
+# "Mr. Jones", "e.g. this", "J. R. R. Tolkien". Single letters cover
+# initials, e.g. and i.e.
+ABBREVIATION = re.compile(r'(?:^|[\s(\["\'.])(?:mr|mrs|ms|dr|prof|st|sr|jr|vs|[a-z])\.$', re.IGNORECASE)
+CLAUSE_END = re.compile(r'[,;:—]\s+')
+
+_DONE = object()
+
+
+class ChunkStream:
+    """Iterable handed to playback while synthesis is still filling it."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, chunk):
+        self._queue.put(chunk)
+
+    def close(self):
+        self._queue.put(_DONE)
+
+    def __iter__(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is _DONE:
+                return
+            yield chunk
+
+
+def split_sentences(fragments, min_clause_chars=40, first_clause_chars=20):
+    """
+    Re-chunk a stream of text fragments into speakable sentences or clauses.
+
+    Full sentences are emitted as soon as their terminator has been seen.
+    Long runs without a sentence break are cut at the last clause boundary
+    once they reach min_clause_chars (first_clause_chars for the first
+    segment, so the first audio can start as early as possible).
+
+    Args:
+        fragments (iterable of str): Token deltas as they arrive from the LLM
+        min_clause_chars (int): Minimum length before splitting on a clause
+        first_clause_chars (int): Same as min_clause_chars, for the first segment
+
+    Yields:
+        str: Stripped, non-empty segments in order
+    """
+    buffer = ""
+    emitted = 0
+    for fragment in fragments:
+        if not fragment:
+            continue
+        buffer += fragment
+        while True:
+            cut = None
+            for match in SENTENCE_END.finditer(buffer):
+                if not ABBREVIATION.search(buffer[:match.start() + 1]):
+                    cut = match.end()
+                    break
+            if cut is None:
+                threshold = first_clause_chars if emitted == 0 else min_clause_chars
+                if len(buffer) >= threshold:
+                    for match in CLAUSE_END.finditer(buffer):
+                        if match.end() >= threshold:
+                            cut = match.end()
+                            break
+            if cut is None:
+                break
+            segment, buffer = buffer[:cut].strip(), buffer[cut:]
+            if segment:
+                emitted += 1
+                yield segment
+    segment = buffer.strip()
+    if segment:
+        yield segment
+
+
+class SpeechPipeline:
+    """
+    Overlaps text generation, speech synthesis and playback.
+
+    Segments submitted with submit() are synthesized on one worker thread and
+    played on another, so segment N+1 is synthesized while segment N plays
+    and while the LLM is still producing segment N+2. Both stages consume
+    FIFO queues, so playback order always matches submission order. Audio
+    chunks are forwarded to playback as they arrive, so the first segment
+    starts playing before its synthesis has finished.
+
+    cancel() abandons the remaining work: synthesis stops pulling chunks,
+    queued segments are skipped and stop() is called to cut off the audio
+    that is currently playing.
+
+    Args:
+        synthesize (callable): text -> iterable of audio byte chunks
+        play (callable): iterable of bytes -> None, blocks until played
+        stop (callable or None): Interrupts a play() in progress
+        max_pending (int): Bound on synthesized-but-unplayed segments
+    """
+
+    def __init__(self, synthesize, play, stop=None, max_pending=4):
+        self.synthesize = synthesize
+        self.play = play
+        self.stop = stop
+        self.cancelled = threading.Event()
+        self.text_queue = queue.Queue()
+        self.audio_queue = queue.Queue(maxsize=max_pending)
+        self.segments = []
+        self.completed_segments = 0
+        self.synthesized_bytes = 0
+        self.played_bytes = 0
+        self.on_first_byte = None
+        self.on_first_audio = None
+        self._threads = []
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._synthesize_worker, daemon=True),
+            threading.Thread(target=self._playback_worker, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def submit(self, segment):
+        self.segments.append(segment)
+        self.text_queue.put(segment)
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.stop:
+            self.stop()
+
+    def _until_cancelled(self, chunks):
+        for chunk in chunks:
+            if self.cancelled.is_set():
+                return
+            yield chunk
+
+    @property
+    def unspoken_text(self):
+        """Text of the segments whose playback never completed."""
+        return " ".join(self.segments[self.completed_segments:])
+
+    def finish(self):
+        """Signal that no more segments will be submitted and wait for playback."""
+        self.text_queue.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        return " ".join(self.segments)
+
+    def _synthesize_worker(self):
+        while True:
+            segment = self.text_queue.get()
+            if segment is _DONE:
+                self.audio_queue.put(_DONE)
+                return
+            if self.cancelled.is_set():
+                continue
+            stream = ChunkStream()
+            self.audio_queue.put(stream)
+            try:
+                audio = self.synthesize(segment)
+                for chunk in self._until_cancelled(audio):
+                    if not self.synthesized_bytes and self.on_first_byte:
+                        self.on_first_byte()
+                    self.synthesized_bytes += len(chunk)
+                    stream.put(chunk)
+                if self.cancelled.is_set() and hasattr(audio, "close"):
+                    # Closing the generator releases the HTTP response early
+                    audio.close()
+            except Exception as e:
+                print(f"Synthesis error: {e}")
+            finally:
+                stream.close()
+
+    def _playback_worker(self):
+        first = True
+        while True:
+            audio = self.audio_queue.get()
+            if audio is _DONE:
+                return
+            if self.cancelled.is_set():
+                continue
+            if first:
+                first = False
+                if self.on_first_audio:
+                    self.on_first_audio()
+            try:
+                result = self.play(self._until_cancelled(audio))
+                self.played_bytes += getattr(result, "bytes_played", 0)
+                if not self.cancelled.is_set():
+                    self.completed_segments += 1
+            except Exception as e:
+                print(f"Playback error: {e}")
@@ -0,0 +1,232 @@
+# stand_in_server.py
+# Minimal local HTTP server standing in for the remote APIs in offline tests
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between requests
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status=200, body=b"", content_type="text/plain"):
+        self.server.count_request(self.command, self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond()
+
+    def do_GET(self):
+        self._respond(body=b"ok")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self._respond(body=b"ok")
+
+
+class FakeApiConfig:
+    """
+    Timing knobs for FakeApiHandler.
+
+    Args:
+        first_token_delay (float): Seconds before the first chat token
+        tokens_per_second (float): Chat token rate after the first one
+        tts_first_byte_delay (float): Seconds before the first audio byte
+        tts_realtime_factor (float): Audio generated per second of wall time,
+            as a multiple of real time (4.0 means 4 s of audio per second)
+        jitter (float): Uniform +/- seconds added to every delay
+        reply (str): Chat reply; "{prompt}" is replaced by the user message
+        sample_rate (int): Rate of the 16-bit mono PCM returned by TTS
+        chars_per_second (float): Speaking rate used to size the audio
+        seed (int or None): Seed for reproducible jitter
+    """
+
+    def __init__(self, first_token_delay=0.3, tokens_per_second=40.0, tts_first_byte_delay=0.2,
+                 tts_realtime_factor=4.0, jitter=0.0, reply="This is a stand-in reply. You said: {prompt}.",
+                 sample_rate=22050, chars_per_second=15.0, seed=None):
+        self.first_token_delay = first_token_delay
+        self.tokens_per_second = tokens_per_second
+        self.tts_first_byte_delay = tts_first_byte_delay
+        self.tts_realtime_factor = tts_realtime_factor
+        self.jitter = jitter
+        self.reply = reply
+        self.sample_rate = sample_rate
+        self.chars_per_second = chars_per_second
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, seconds):
+        with self._lock:
+            offset = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        time.sleep(max(0.0, seconds + offset))
+
+
+class FakeApiHandler(StandInHandler):
+    """
+    Mimics the OpenAI streaming chat and ElevenLabs TTS endpoints the assistant uses.
+
+    POST /v1/chat/completions streams server-sent events in the OpenAI
+    chunk format. GET /v1/voices lists the configured voice, and
+    POST /v1/text-to-speech/<voice_id>[/stream] streams silent 16-bit PCM
+    whose length matches the text. Timing comes from server.config.
+    """
+
+    VOICE_ID = "StandInVoice00000000"  # Real IDs are 20 alphanumerics
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return {}
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.startswith("/v1/voices"):
+            voice = {"voice_id": self.VOICE_ID, "name": "Glinda", "category": "premade"}
+            body = json.dumps({"voices": [voice]}).encode()
+            self._respond(body=body, content_type="application/json")
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        if self.path.startswith("/v1/chat/completions"):
+            self._chat(self._read_json())
+        elif re.match(r"^/v1/text-to-speech/[^/?]+", self.path):
+            self._speech(self._read_json())
+        else:
+            super().do_POST()
+
+    def _chat(self, request):
+        self.server.count_request(self.command, self.path)
+        config = self.server.config
+        messages = request.get("messages") or [{}]
+        prompt = messages[-1].get("content", "")
+        tokens = re.findall(r"\S+\s*", config.reply.format(prompt=prompt))
+        self._start_chunked("text/event-stream")
+        config.delay(config.first_token_delay)
+        for i, token in enumerate(tokens):
+            if i:
+                config.delay(1.0 / config.tokens_per_second)
+            chunk = {
+                "id": "chatcmpl-stand-in",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-3.5-turbo"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            self._write_chunk(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+        done = {
+            "id": "chatcmpl-stand-in",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-3.5-turbo"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        self._write_chunk(b"data: " + json.dumps(done).encode() + b"\n\n")
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+    def _speech(self, request):
+        self.server.count_request(self.command, self.path)
+        config = self.server.config
+        seconds = max(0.2, len(request.get("text", "")) / config.chars_per_second)
+        total = int(seconds * config.sample_rate) * 2
+        chunk_size = 4096
+        chunk_seconds = chunk_size / 2 / config.sample_rate / config.tts_realtime_factor
+        self._start_chunked("audio/pcm")
+        config.delay(config.tts_first_byte_delay)
+        sent = 0
+        while sent < total:
+            if sent:
+                config.delay(chunk_seconds)
+            size = min(chunk_size, total - sent)
+            self._write_chunk(b"\x00" * size)
+            sent += size
+        self._end_chunked()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local server that counts TCP connections and requests.
+
+    Point OPENAI_BASE_URL / ELEVENLABS_BASE_URL (or a ConnectionPool) at
+    server.url; if connection reuse works, connections stays at one per
+    pooled socket while requests keeps growing.
+
+    With handler=FakeApiHandler it also answers the OpenAI and ElevenLabs
+    calls the assistant makes, timed by config.
+
+    Args:
+        handler (type): Request handler class
+        port (int): Port to bind on 127.0.0.1, 0 for any free port
+        config (FakeApiConfig or None): Timing for FakeApiHandler
+    """
+
+    daemon_threads = True
+
+    def __init__(self, handler=StandInHandler, port=0, config=None):
+        super().__init__(("127.0.0.1", port), handler)
+        self.config = config or FakeApiConfig()
+        self.connections = 0
+        self.requests = []
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def process_request(self, request, client_address):
+        with self._count_lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-stream when a turn is cancelled; that is expected
+        pass
+
+    def count_request(self, method, path):
+        with self._count_lock:
+            self.requests.append((method, path))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
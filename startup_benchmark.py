@@ -0,0 +1,163 @@
+# startup_benchmark.py
+# Cold-start timing: interpreter launch -> window painted -> assistant ready
+#
+# Each run starts a fresh interpreter under -X importtime, builds the real
+# window and reports how long it took to appear, how long until the
+# background loader finished, and which imports the window had to wait
+# for. The API endpoints point at a local stand-in server, so no keys or
+# network are needed; without audio hardware the ready stage fails but the
+# window time is still measured.
+#
+#   python startup_benchmark.py --runs 5 --max-window-ms 1000
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from stand_in_server import FakeApiHandler, StandInServer
+from trace_report import percentile
+
+# Modules that must not load before the window is up
+HEAVY_MODULES = ("openai", "elevenlabs", "speech_recognition", "numpy", "pyaudio", "httpx")
+
+_DRIVER = """
+import sys
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+import main
+
+app = QApplication(sys.argv)
+window = main.AriaAssistantUI()
+window.show()
+# Checked before the event loop runs, since that is when the background loader starts
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+app.processEvents()
+print("WINDOW " + ",".join(heavy), flush=True)
+
+def on_ready(ok, detail):
+    print(("READY " if ok else "FAILED ") + detail.replace("\\n", " "), flush=True)
+    app.quit()
+
+window.signal_emitter.ready_signal.connect(on_ready)
+QTimer.singleShot({timeout_ms}, app.quit)
+app.exec_()
+"""
+
+
+def parse_importtime(lines):
+    """Return (cumulative_us, module) for top-level imports from -X importtime output."""
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            # Indented names were imported by another module and are counted in its total
+            continue
+        imports.append((int(cumulative), name.strip()))
+    return imports
+
+
+def run_once(env, timeout):
+    command = [sys.executable, "-X", "importtime", "-c",
+               _DRIVER.format(heavy=HEAVY_MODULES, timeout_ms=int(timeout * 1000))]
+    started = time.perf_counter()
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.extend(proc.stderr), daemon=True)
+    reader.start()
+
+    result = {"window_ms": None, "ready_ms": None, "ready_error": None, "heavy_before_window": []}
+    window_imports = None
+    for line in proc.stdout:
+        elapsed = (time.perf_counter() - started) * 1000
+        kind, _, detail = line.rstrip("\n").partition(" ")
+        if kind == "WINDOW":
+            result["window_ms"] = round(elapsed, 1)
+            result["heavy_before_window"] = [name for name in detail.split(",") if name]
+            window_imports = len(stderr)
+        elif kind == "READY":
+            result["ready_ms"] = round(elapsed, 1)
+        elif kind == "FAILED":
+            result["ready_error"] = detail
+    proc.wait()
+    reader.join()
+    # stderr is read concurrently, so the split is approximate but close enough for ranking
+    result["window_imports"] = parse_importtime(stderr[:window_imports])
+    result["returncode"] = proc.returncode
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time-to-window and time-to-ready")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for ready")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--onscreen", action="store_true",
+                        help="use the real display instead of Qt's offscreen platform")
+    parser.add_argument("--max-window-ms", type=float, help="exit non-zero if median time-to-window exceeds this")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with StandInServer(FakeApiHandler) as server:
+        env = dict(os.environ)
+        env.update({
+            "OPENAI_BASE_URL": server.url + "/v1",
+            "ELEVENLABS_BASE_URL": server.url,
+            "OPENAI_API_KEY": env.get("OPENAI_API_KEY", "stand-in"),
+            "ELEVENLABS_API_KEY": env.get("ELEVENLABS_API_KEY", "stand-in"),
+        })
+        if not args.onscreen:
+            env["QT_QPA_PLATFORM"] = "offscreen"
+        runs = [run_once(env, args.timeout) for _ in range(args.runs)]
+
+    window = sorted(r["window_ms"] for r in runs if r["window_ms"] is not None)
+    ready = sorted(r["ready_ms"] for r in runs if r["ready_ms"] is not None)
+    slowest = {}
+    for r in runs:
+        for cumulative, name in r["window_imports"]:
+            slowest[name] = max(slowest.get(name, 0), cumulative)
+    summary = {
+        "runs": len(runs),
+        "window_ms": {q: percentile(window, q) for q in (50, 95)} if window else None,
+        "ready_ms": {q: percentile(ready, q) for q in (50, 95)} if ready else None,
+        "ready_errors": sorted({r["ready_error"] for r in runs if r["ready_error"]}),
+        "heavy_before_window": sorted({name for r in runs for name in r["heavy_before_window"]}),
+        "slowest_window_imports_ms": [
+            [name, round(us / 1000, 1)] for name, us in sorted(slowest.items(), key=lambda i: -i[1])[:args.top]
+        ],
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        if window:
+            print(f"time-to-window  p50 {summary['window_ms'][50]:.0f} ms  p95 {summary['window_ms'][95]:.0f} ms")
+        else:
+            print("window never appeared")
+        if ready:
+            print(f"time-to-ready   p50 {summary['ready_ms'][50]:.0f} ms  p95 {summary['ready_ms'][95]:.0f} ms")
+        for error in summary["ready_errors"]:
+            print(f"ready failed: {error}")
+        if summary["heavy_before_window"]:
+            print(f"loaded before the window: {', '.join(summary['heavy_before_window'])}")
+        print("slowest imports before the window:")
+        for name, ms in summary["slowest_window_imports_ms"]:
+            print(f"  {ms:>8.1f} ms  {name}")
+
+    if not window:
+        sys.exit(1)
+    if summary["heavy_before_window"]:
+        sys.exit(1)
+    if args.max_window_ms is not None and summary["window_ms"][50] > args.max_window_ms:
+        print(f"Median time-to-window {summary['window_ms'][50]:.0f} ms exceeds {args.max_window_ms:.0f} ms",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
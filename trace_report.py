@@ -0,0 +1,88 @@
+# trace_report.py
+# Summarize per-stage turn latency from the JSONL traces written by tracing.py
+#
+#   python trace_report.py traces/*.jsonl [--deltas] [--include-cancelled]
+import argparse
+import glob
+import json
+import math
+
+from tracing import STAGES
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def load_records(patterns):
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report p50/p95/p99 latency per turn stage")
+    parser.add_argument("files", nargs="+", help="JSONL trace files or glob patterns")
+    parser.add_argument("--deltas", action="store_true",
+                        help="time spent in each stage instead of time since end of speech")
+    parser.add_argument("--include-cancelled", action="store_true")
+    parser.add_argument("--route", help="only turns with this route (llm, intent, exit)")
+    args = parser.parse_args()
+
+    samples = {stage: [] for stage in STAGES}
+    # Turn latency by route, and by intent for locally answered turns
+    routes = {}
+    sessions = set()
+    turns = 0
+    for record in load_records(args.files):
+        if record.get("cancelled") and not args.include_cancelled:
+            continue
+        if args.route and record.get("route") != args.route:
+            continue
+        turns += 1
+        sessions.add(record.get("session"))
+        stages = record.get("stages_ms", {})
+        route = record.get("route", "none")
+        if record.get("intent"):
+            route = f"{route}:{record['intent']}"
+        if "playback_start" in stages:
+            routes.setdefault(route, []).append(stages["playback_start"])
+        previous = None
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            value = stages[stage]
+            if args.deltas:
+                if previous is not None:
+                    samples[stage].append(value - previous)
+                previous = value
+            else:
+                samples[stage].append(value)
+
+    print(f"{turns} turns across {len(sessions)} sessions "
+          f"({'per-stage time' if args.deltas else 'ms since end of speech'})")
+    print(f"{'stage':<16} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage in STAGES:
+        values = sorted(samples[stage])
+        if not values:
+            continue
+        p50, p95, p99 = (percentile(values, q) for q in (50, 95, 99))
+        print(f"{stage:<16} {len(values):>6} {p50:>8.0f} {p95:>8.0f} {p99:>8.0f}")
+
+    if routes:
+        print(f"\n{'route':<24} {'turns':>6} {'p50':>8} {'p95':>8}   (end of speech -> playback start)")
+        for route, values in sorted(routes.items(), key=lambda item: -len(item[1])):
+            values.sort()
+            print(f"{route:<24} {len(values):>6} {percentile(values, 50):>8.0f} {percentile(values, 95):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# tracing.py
+# Lightweight per-turn latency tracing, written as one JSONL record per turn
+import json
+import os
+import threading
+import time
+import uuid
+
+# In pipeline order; trace_report.py prints them in this order too
+STAGES = (
+    "end_of_speech",
+    "endpoint",
+    "asr_result",
+    "route_decision",
+    "llm_first_token",
+    "llm_last_token",
+    "tts_first_byte",
+    "playback_start",
+    "playback_end",
+)
+
+
+class _NullTrace:
+    """Stand-in used when tracing is off; every call is a no-op."""
+
+    __slots__ = ()
+
+    def mark(self, stage, at=None):
+        pass
+
+    def annotate(self, **fields):
+        pass
+
+    def finish(self, **fields):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class TurnTrace:
+    """
+    Stage timestamps for one turn.
+
+    Times are taken with time.perf_counter() and stored relative to
+    origin, the end of the user's speech (or the trace's start when that
+    is not known). Only the first mark of each stage counts, so callers
+    that run once per segment can mark unconditionally.
+    """
+
+    __slots__ = ("tracer", "turn_id", "started_at", "origin", "marks", "fields")
+
+    def __init__(self, tracer, turn_id, origin=None):
+        self.tracer = tracer
+        self.turn_id = turn_id
+        now = time.perf_counter()
+        self.origin = now if origin is None else min(origin, now)
+        self.started_at = time.time() - (now - self.origin)
+        self.marks = {}
+        self.fields = {}
+
+    def mark(self, stage, at=None):
+        if stage not in self.marks:
+            self.marks[stage] = (time.perf_counter() if at is None else at) - self.origin
+
+    def annotate(self, **fields):
+        self.fields.update(fields)
+
+    def finish(self, **fields):
+        self.fields.update(fields)
+        self.tracer.write(self)
+
+
+class Tracer:
+    """
+    Hands out turn traces and appends finished ones to a JSONL file.
+
+    With no path the tracer is disabled and start() returns NULL_TRACE,
+    so the only cost left in the pipeline is a method call that does
+    nothing.
+
+    Args:
+        path (str or None): JSONL file to append to, None to disable
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.enabled = bool(path)
+        self.session = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        if self.enabled:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+    def start(self, turn_id, speech_ended_at=None):
+        """
+        Args:
+            turn_id (int): The turn being traced
+            speech_ended_at (float or None): time.perf_counter() when the
+                user stopped speaking; stages are measured from there, and
+                the endpoint stage is the time it took to decide the turn
+                was over. None measures from now.
+        """
+        if not self.enabled:
+            return NULL_TRACE
+        trace = TurnTrace(self, turn_id, origin=speech_ended_at)
+        trace.mark("end_of_speech", at=trace.origin)
+        trace.mark("endpoint")
+        return trace
+
+    def write(self, trace):
+        record = {
+            "session": self.session,
+            "turn": trace.turn_id,
+            "started_at": round(trace.started_at, 3),
+            "stages_ms": {stage: round(t * 1000, 1) for stage, t in trace.marks.items()},
+        }
+        record.update(trace.fields)
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"Trace write error: {e}")
@@ -0,0 +1,195 @@
+# transcript.py
+# Bounded chat transcript: a capped Qt list model that spills old turns to disk
+import json
+import os
+import itertools
+import threading
+import time
+from collections import deque
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QStyledItemDelegate
+
+USER = "user"
+ARIA = "aria"
+
+_PREFIX = {USER: "USER >>> ", ARIA: "ARIA >>> "}
+_COLOR = {USER: QColor("#00BFFF"), ARIA: QColor("#00FFFF")}
+
+# Identifies a row's content for size caching: (message number, text length)
+KeyRole = Qt.UserRole + 1
+
+
+class TranscriptArchive:
+    """
+    Append-only JSONL file holding the turns that left the in-memory window.
+
+    Args:
+        path (str or None): File to append to, None to drop evicted turns
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.count = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, messages):
+        self.count += len(messages)
+        if not self.path:
+            return
+        lines = "".join(json.dumps(m) + "\n" for m in messages)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"Transcript archive error: {e}")
+
+
+class TranscriptModel(QAbstractListModel):
+    """
+    The chat history as a list model, holding at most max_messages rows.
+
+    Any thread may call add_message(), append_delta() and finish_response();
+    they only queue an operation. A timer on the GUI thread applies the
+    queue once per frame, so a burst of streamed tokens becomes one
+    dataChanged for the open reply rather than a repaint per token. Rows
+    pushed out of the window are written to the archive.
+
+    Args:
+        max_messages (int): Rows kept in memory and in the view
+        archive (TranscriptArchive or None): Where evicted rows go
+        frame_ms (int): Flush interval; 16 ms matches a 60 Hz display
+        parent (QObject or None): Qt parent
+    """
+
+    def __init__(self, max_messages=500, archive=None, frame_ms=16, parent=None):
+        super().__init__(parent)
+        self.max_messages = max_messages
+        self.archive = archive or TranscriptArchive()
+        self._messages = deque()
+        self._numbers = itertools.count()
+        # Index in _messages of the reply still being streamed, if any
+        self._open = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setInterval(frame_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    # --- thread-safe producers ---
+
+    def add_message(self, text, is_user=True):
+        with self._lock:
+            self._pending.append(("message", USER if is_user else ARIA, text))
+
+    def append_delta(self, text):
+        """Add streamed text to the open Aria reply, opening one if needed."""
+        with self._lock:
+            if self._pending and self._pending[-1][0] == "delta":
+                self._pending[-1] = ("delta", ARIA, self._pending[-1][2] + text)
+            else:
+                self._pending.append(("delta", ARIA, text))
+
+    def finish_response(self, text):
+        """Replace the open reply with its final text and close it."""
+        with self._lock:
+            self._pending.append(("final", ARIA, text))
+
+    # --- GUI thread ---
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        changed_rows = set()
+        for kind, role, text in pending:
+            if kind == "message":
+                self._open = None
+                self._insert(role, text)
+            elif self._open is None:
+                self._insert(role, text)
+                self._open = len(self._messages) - 1 if kind == "delta" else None
+            else:
+                message = self._messages[self._open]
+                message["text"] = message["text"] + text if kind == "delta" else text
+                changed_rows.add(self._open)
+                if kind == "final":
+                    self._open = None
+        for row in changed_rows:
+            if row < len(self._messages):
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])
+        self._evict()
+
+    def _insert(self, role, text):
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._messages.append({"n": next(self._numbers), "t": round(time.time(), 3), "role": role, "text": text})
+        self.endInsertRows()
+
+    def _evict(self):
+        excess = len(self._messages) - self.max_messages
+        if self._open is not None:
+            # Never evict the reply that is still streaming in
+            excess = min(excess, self._open)
+        if excess <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+        evicted = [self._messages.popleft() for _ in range(excess)]
+        if self._open is not None:
+            self._open -= excess
+        self.endRemoveRows()
+        self.archive.write(evicted)
+
+    # --- QAbstractListModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._messages):
+            return None
+        message = self._messages[index.row()]
+        if role == Qt.DisplayRole:
+            return _PREFIX[message["role"]] + message["text"]
+        if role == Qt.ForegroundRole:
+            return _COLOR[message["role"]]
+        if role == KeyRole:
+            return message["n"], len(message["text"])
+        return None
+
+
+class TranscriptDelegate(QStyledItemDelegate):
+    """
+    Item delegate that remembers each row's wrapped size.
+
+    A list view with word wrap asks for every row's size hint whenever rows
+    are inserted or removed, and laying out wrapped text is the expensive
+    part of a frame. Sizes are cached per message, text length and width,
+    so only new or changed rows are measured.
+
+    Args:
+        max_entries (int): Cache size; keep it above the model's max_messages
+        parent (QObject or None): Qt parent
+    """
+
+    def __init__(self, max_entries=2000, parent=None):
+        super().__init__(parent)
+        self.max_entries = max_entries
+        self._sizes = {}
+
+    def sizeHint(self, option, index):
+        key = (index.data(KeyRole), option.rect.width())
+        size = self._sizes.get(key)
+        if size is None:
+            size = super().sizeHint(option, index)
+            if len(self._sizes) >= self.max_entries:
+                # Drop the oldest half; dicts keep insertion order
+                for stale in list(self._sizes)[:self.max_entries // 2]:
+                    del self._sizes[stale]
+            self._sizes[key] = size
+        return size
@@ -0,0 +1,106 @@
+# transcript_stress.py
+# Stress test: push 100k messages through the transcript model and view,
+# checking that memory and frame time stay flat as the session grows
+#
+#   python transcript_stress.py [--messages 100000] [--per-frame 10] [--deltas 20]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from trace_report import percentile
+
+
+def rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current off Linux, which still shows unbounded growth
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript memory and frame-time stress test")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--per-frame", type=int, default=10, help="messages added between frames")
+    parser.add_argument("--deltas", type=int, default=20, help="streamed tokens per Aria reply")
+    parser.add_argument("--window", type=int, default=500, help="messages kept in memory")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--max-growth-mb", type=float, default=20.0,
+                        help="fail if RSS grows more than this after the first sample")
+    parser.add_argument("--onscreen", action="store_true")
+    args = parser.parse_args()
+
+    if not args.onscreen:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication, QListView
+    from transcript import TranscriptArchive, TranscriptDelegate, TranscriptModel
+
+    app = QApplication(sys.argv)
+    archive_path = os.path.join(tempfile.mkdtemp(prefix="aria-transcript-"), "transcript.jsonl")
+    model = TranscriptModel(max_messages=args.window, archive=TranscriptArchive(archive_path))
+    view = QListView()
+    view.setModel(model)
+    view.setItemDelegate(TranscriptDelegate(max_entries=4 * args.window, parent=view))
+    view.setWordWrap(True)
+    view.setVerticalScrollMode(QListView.ScrollPerPixel)
+    view.resize(800, 600)
+    view.show()
+    app.processEvents()
+
+    sample_every = max(1, args.messages // args.samples)
+    samples = []
+    frame_times = []
+    sent = 0
+    started = time.perf_counter()
+    while sent < args.messages:
+        for _ in range(args.per_frame):
+            if sent % 2 == 0:
+                model.add_message(f"user message {sent} asking about something", True)
+            else:
+                for token in range(args.deltas):
+                    model.append_delta(f"token{token} ")
+                model.finish_response(f"aria reply {sent} " + "word " * args.deltas)
+            sent += 1
+            if sent % sample_every == 0:
+                samples.append((sent, rss_mb(), frame_times))
+                frame_times = []
+        frame_started = time.perf_counter()
+        model.flush()
+        view.scrollToBottom()
+        view.viewport().repaint()
+        app.processEvents()
+        frame_times.append((time.perf_counter() - frame_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    print(f"{sent} messages in {elapsed:.1f} s, {model.rowCount()} in memory, "
+          f"{model.archive.count} archived to {archive_path}")
+    print(f"{'messages':>9} {'rss MB':>8} {'frame p50':>10} {'frame p95':>10}")
+    for count, rss, frames in samples:
+        frames = sorted(frames)
+        p50 = percentile(frames, 50) or 0.0
+        p95 = percentile(frames, 95) or 0.0
+        print(f"{count:>9} {rss:>8.1f} {p50:>8.2f}ms {p95:>8.2f}ms")
+
+    first_rss, last_rss = samples[0][1], samples[-1][1]
+    first_p95 = percentile(sorted(samples[0][2]), 95) or 0.0
+    last_p95 = percentile(sorted(samples[-1][2]), 95) or 0.0
+    failed = False
+    if last_rss - first_rss > args.max_growth_mb:
+        print(f"RSS grew {last_rss - first_rss:.1f} MB", file=sys.stderr)
+        failed = True
+    # Frame time may wobble, but it must not scale with the number of messages
+    if last_p95 > max(2 * first_p95, first_p95 + 2.0):
+        print(f"Frame p95 grew from {first_p95:.2f} ms to {last_p95:.2f} ms", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
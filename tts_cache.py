@@ -0,0 +1,151 @@
+# tts_cache.py
+# Persistent, size-bounded cache of synthesized speech
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aria", "tts")
+
+
+class AudioCache:
+    """
+    On-disk cache of TTS audio keyed by text and the full voice settings.
+
+    Each entry is one file named after the SHA-256 of its key. Entries are
+    evicted least-recently-used first once their total size exceeds
+    max_bytes. Writes go to a temporary file in the same directory and are
+    moved into place with os.replace(), so a crash never leaves a truncated
+    entry behind.
+
+    Args:
+        directory (str): Where cached audio files are stored
+        max_bytes (int): Upper bound on the total size of all entries
+    """
+
+    SUFFIX = ".audio"
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.SUFFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((st.st_mtime, name[:-len(self.SUFFIX)], st.st_size))
+        # Oldest first, so the most recently used entries end up last
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def make_key(text, settings):
+        payload = json.dumps({"text": text, "settings": settings}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, text, settings):
+        key = self.make_key(text, settings)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            # mtime doubles as the recency stamp across restarts
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self.total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, text, settings, audio):
+        key = self.make_key(text, settings)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Audio cache write error: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self.total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            self.total_bytes += len(audio)
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def __contains__(self, item):
+        text, settings = item
+        with self._lock:
+            return self.make_key(text, settings) in self._entries
+
+    def stream(self, text, settings, synthesize):
+        """
+        Yield audio for text, from the cache if possible.
+
+        On a miss the chunks from synthesize(text) are passed through as they
+        arrive and stored once the stream has been fully consumed, so a
+        cancelled or failed synthesis is never cached.
+        """
+        cached = self.get(text, settings)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        for chunk in synthesize(text):
+            chunks.append(chunk)
+            yield chunk
+        self.put(text, settings, b"".join(chunks))
+
+    def prewarm(self, texts, settings, synthesize):
+        """Synthesize and store every text not already cached, on a background thread."""
+        def worker():
+            for text in texts:
+                if (text, settings) in self:
+                    continue
+                try:
+                    for _ in self.stream(text, settings, synthesize):
+                        pass
+                except Exception as e:
+                    print(f"Audio cache prewarm error: {e}")
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,176 @@
+# turn_scheduler.py
+# Bounded, ordered scheduling of conversation turns through the voice pipeline
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import NULL_TRACE
+
+_STOP = object()
+
+
+class Turn:
+    """
+    One user utterance on its way through capture -> ASR -> route -> LLM -> TTS -> playback.
+
+    Stages check is_cancelled between units of work and can register
+    callbacks with on_cancel() to abort blocking work (an HTTP stream,
+    audio playback) the moment the turn becomes stale.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, audio=None, text=None):
+        self.id = next(Turn._ids)
+        self.audio = audio
+        self.text = text
+        self.created_at = time.perf_counter()
+        self.trace = NULL_TRACE
+        self._cancelled = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Turn cancel callback error: {e}")
+
+    def on_cancel(self, callback):
+        """Run callback when the turn is cancelled, or right away if it already is."""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+class TurnScheduler:
+    """
+    Runs turns through the pipeline with bounded concurrency and in order.
+
+    Captured audio is submitted from the capture loop. Speech recognition
+    runs on a small fixed pool, and everything after it (routing, the LLM,
+    synthesis and playback) runs on a single responder thread, so replies
+    can never play out of order. Once a new turn has a transcript, every
+    older turn that has not finished is cancelled, since a reply to a
+    superseded utterance is no longer wanted; audio that turns out not to
+    be speech (a cough, a door) leaves the turn in progress alone. With at
+    most one live turn plus asr_workers recognitions in flight, a burst of
+    speech cannot pile up threads.
+
+    Args:
+        recognize (callable): Turn -> transcript str or None
+        respond (callable): Turn -> None; routes, generates and speaks the reply
+        asr_workers (int): Recognitions allowed to run concurrently
+        tracer (tracing.Tracer or None): Starts a latency trace for each turn
+    """
+
+    def __init__(self, recognize, respond, asr_workers=2, tracer=None):
+        self.recognize = recognize
+        self.respond = respond
+        self.tracer = tracer
+        self.stats = {"submitted": 0, "cancelled": 0, "unrecognized": 0, "completed": 0}
+        self.idle = threading.Event()
+        self.idle.set()
+        self._asr_pool = ThreadPoolExecutor(max_workers=asr_workers, thread_name_prefix="asr")
+        self._ready = queue.Queue()
+        self._live = {}
+        self._lock = threading.Lock()
+        self._last_started = 0
+        self._responder = threading.Thread(target=self._respond_loop, daemon=True)
+        self._responder.start()
+
+    def submit(self, audio=None, text=None, speech_ended_at=None):
+        """
+        Queue a turn; older turns are cancelled once it has a transcript.
+
+        A turn submitted with text skips recognition. speech_ended_at is
+        when the user actually stopped talking (time.perf_counter()), if
+        the capture knows; traces are measured from it.
+        """
+        turn = Turn(audio=audio, text=text)
+        if self.tracer is not None:
+            turn.trace = self.tracer.start(turn.id, speech_ended_at)
+        with self._lock:
+            self._live[turn.id] = turn
+            self.stats["submitted"] += 1
+            self.idle.clear()
+        if text is not None:
+            self._supersede(turn)
+            self._ready.put(turn)
+        else:
+            self._asr_pool.submit(self._recognize, turn)
+        return turn
+
+    def _supersede(self, turn):
+        with self._lock:
+            stale = [old for old in self._live.values() if old.id < turn.id]
+        for old in stale:
+            if not old.is_cancelled:
+                self.stats["cancelled"] += 1
+                old.cancel()
+
+    def cancel_all(self):
+        with self._lock:
+            live = list(self._live.values())
+        for turn in live:
+            turn.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._ready.put(_STOP)
+        self._asr_pool.shutdown(wait=False)
+
+    def _finish(self, turn):
+        turn.trace.finish(cancelled=turn.is_cancelled)
+        with self._lock:
+            self._live.pop(turn.id, None)
+            if not self._live:
+                self.idle.set()
+
+    def _recognize(self, turn):
+        try:
+            if not turn.is_cancelled:
+                turn.text = self.recognize(turn)
+        except Exception as e:
+            print(f"Recognition error: {e}")
+        if turn.is_cancelled:
+            self._finish(turn)
+        elif not turn.text:
+            self.stats["unrecognized"] += 1
+            self._finish(turn)
+        else:
+            self._supersede(turn)
+            self._ready.put(turn)
+
+    def _respond_loop(self):
+        while True:
+            turn = self._ready.get()
+            if turn is _STOP:
+                return
+            # Recognition can finish out of order; never answer an older turn after a newer one
+            if turn.is_cancelled or turn.id < self._last_started:
+                self._finish(turn)
+                continue
+            self._last_started = turn.id
+            try:
+                self.respond(turn)
+                if not turn.is_cancelled:
+                    self.stats["completed"] += 1
+            except Exception as e:
+                print(f"Processing error: {e}")
+            finally:
+                self._finish(turn)
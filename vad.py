@@ -0,0 +1,201 @@
+# vad.py
+# Vectorized voice-activity detection and early endpointing
+import numpy as np
+
+_EPS = 1e-10
+
+
+def pcm_to_float(data, sample_width=2):
+    """Convert little-endian signed PCM bytes to float32 samples in [-1, 1]."""
+    if sample_width == 2:
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_width == 4:
+        return np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648.0
+    if sample_width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
+def frame_features(frames):
+    """
+    Compute per-frame features for a block of frames in one vectorized pass.
+
+    Args:
+        frames (np.ndarray): Shape (n_frames, frame_size) of float samples
+
+    Returns:
+        tuple of np.ndarray: (energy_db, zero_crossing_rate, spectral_flatness),
+        each of shape (n_frames,)
+    """
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + _EPS)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    window = np.hanning(frames.shape[1]).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2 + _EPS
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    return energy_db, zcr, flatness
+
+
+class VoiceActivityDetector:
+    """
+    Scores fixed-size frames for the likelihood that they contain speech.
+
+    The score is driven by the frame's energy above a running noise floor,
+    weighted by how tonal the spectrum is (voiced speech has low spectral
+    flatness, broadband noise has high flatness) and by a zero-crossing
+    rate in the range typical of speech. The noise floor adapts on frames
+    scored as non-speech and tracks downward immediately.
+
+    Any object with frame_seconds, reset() and score(samples, sample_rate)
+    can be used in its place by Endpointer.
+
+    Args:
+        frame_seconds (float): Analysis frame length
+        snr_db (float): Energy above the noise floor that scores 0.5
+        snr_slope_db (float): dB over which the energy score ramps from 0 to 1
+        max_flatness (float): Flatness at or above which a frame looks like noise
+        max_zcr (float): Zero-crossing rate above which a frame looks unvoiced
+        noise_adapt_seconds (float): Time constant of the noise floor tracker
+    """
+
+    def __init__(self, frame_seconds=0.02, snr_db=9.0, snr_slope_db=6.0, max_flatness=0.5,
+                 max_zcr=0.35, noise_adapt_seconds=1.5):
+        self.frame_seconds = frame_seconds
+        self.snr_db = snr_db
+        self.snr_slope_db = snr_slope_db
+        self.max_flatness = max_flatness
+        self.max_zcr = max_zcr
+        self.noise_adapt_seconds = noise_adapt_seconds
+        self.noise_db = None
+
+    def reset(self):
+        # The noise floor is kept across utterances; only per-utterance state would go here
+        pass
+
+    def score(self, frames, sample_rate):
+        """
+        Args:
+            frames (np.ndarray): Shape (n_frames, frame_size) of float samples
+            sample_rate (int): Sample rate of the frames
+
+        Returns:
+            np.ndarray: Speech scores in [0, 1], one per frame
+        """
+        energy_db, zcr, flatness = frame_features(frames)
+        if self.noise_db is None:
+            self.noise_db = float(np.min(energy_db))
+
+        tonal = np.clip((self.max_flatness - flatness) / self.max_flatness, 0.0, 1.0)
+        voiced = np.clip((self.max_zcr - zcr) / self.max_zcr + 0.5, 0.0, 1.0)
+        shape = 0.6 + 0.25 * tonal + 0.15 * voiced
+
+        # The noise floor update is sequential, but only over a handful of
+        # frames per block; the feature extraction above is the expensive part
+        alpha = np.exp(-self.frame_seconds / self.noise_adapt_seconds)
+        scores = np.empty(len(energy_db), dtype=np.float32)
+        noise = self.noise_db
+        for i, energy in enumerate(energy_db):
+            level = (energy - noise - self.snr_db) / self.snr_slope_db + 0.5
+            scores[i] = min(max(level, 0.0), 1.0) * shape[i]
+            if energy < noise:
+                noise = energy
+            elif scores[i] < 0.5:
+                noise = alpha * noise + (1 - alpha) * energy
+        self.noise_db = noise
+        return scores
+
+
+class Endpointer:
+    """
+    Turns a stream of audio blocks into utterance start and end decisions.
+
+    Speech starts after onset_seconds of frames scoring at or above
+    threshold. After that, every frame adds silence evidence in proportion
+    to how far its score is below the threshold, so clearly silent frames
+    count in full and borderline ones only partially. The utterance ends
+    once the evidence reaches the hangover, which grows with the length of
+    speech so far between min_hangover and max_hangover: a short "yes"
+    endpoints quickly while a long sentence tolerates mid-sentence pauses.
+
+    Args:
+        detector (VoiceActivityDetector): Frame scorer
+        threshold (float): Score at or above which a frame counts as speech
+        onset_seconds (float): Speech needed before an utterance starts
+        min_hangover (float): Silence evidence needed to end a short utterance
+        max_hangover (float): Upper bound on the hangover for long utterances
+        hangover_growth (float): Hangover seconds added per second of speech
+    """
+
+    def __init__(self, detector=None, threshold=0.5, onset_seconds=0.1, min_hangover=0.25,
+                 max_hangover=0.7, hangover_growth=0.1):
+        self.detector = detector or VoiceActivityDetector()
+        self.threshold = threshold
+        self.onset_seconds = onset_seconds
+        self.min_hangover = min_hangover
+        self.max_hangover = max_hangover
+        self.hangover_growth = hangover_growth
+        self.reset()
+
+    def reset(self):
+        self.detector.reset()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.elapsed = 0.0
+        self.started = False
+        self.ended = False
+        self.speech_start = None
+        self.speech_end = None
+        self.last_speech = None
+        self._onset = 0.0
+        self._speech = 0.0
+        self._silence_evidence = 0.0
+
+    @property
+    def hangover(self):
+        return min(self.max_hangover, self.min_hangover + self.hangover_growth * self._speech)
+
+    @property
+    def pause_progress(self):
+        """How far the current pause is toward ending the utterance, 0.0 while speech continues."""
+        if not self.started or self.ended:
+            return 0.0
+        return min(1.0, self._silence_evidence / self.hangover)
+
+    def feed(self, samples, sample_rate):
+        """
+        Process a block of float samples.
+
+        Returns:
+            bool: True once the utterance has ended
+        """
+        frame_size = int(round(self.detector.frame_seconds * sample_rate))
+        samples = np.concatenate((self._pending, samples))
+        n_frames = len(samples) // frame_size
+        self._pending = samples[n_frames * frame_size:]
+        if n_frames == 0 or self.ended:
+            return self.ended
+
+        frames = samples[:n_frames * frame_size].reshape(n_frames, frame_size)
+        scores = self.detector.score(frames, sample_rate)
+        step = frame_size / sample_rate
+        for score in scores:
+            self.elapsed += step
+            if score >= self.threshold:
+                self.last_speech = self.elapsed
+                if not self.started:
+                    self._onset += step
+                    if self._onset >= self.onset_seconds:
+                        self.started = True
+                        self.speech_start = self.elapsed - self._onset
+                else:
+                    self._speech += step
+                    self._silence_evidence = 0.0
+                continue
+            if not self.started:
+                self._onset = 0.0
+                continue
+            self._silence_evidence += step * (self.threshold - score) / self.threshold
+            if self._silence_evidence >= self.hangover:
+                self.ended = True
+                self.speech_end = self.last_speech
+                break
+        return self.ended
@@ -0,0 +1,107 @@
+# vad_eval.py
+# Offline evaluation of VAD endpointing on labelled WAV files
+#
+# Each WAV needs a sidecar JSON with the same name (clip.wav -> clip.json)
+# giving the true end of speech in seconds, e.g. {"speech_end": 1.84}.
+#
+#   python vad_eval.py recordings/ --min-hangover 0.2 --max-hangover 0.6
+import argparse
+import glob
+import json
+import os
+import wave
+
+import numpy as np
+
+from vad import Endpointer, VoiceActivityDetector, pcm_to_float
+
+
+def load_wav(path):
+    """Read a WAV file as mono float samples."""
+    with wave.open(path, "rb") as wav:
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        samples = pcm_to_float(wav.readframes(wav.getnframes()), wav.getsampwidth())
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def find_clips(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True))
+        else:
+            yield path
+
+
+def run_clip(endpointer, samples, rate, chunk_size):
+    """Stream samples through the endpointer in chunks, as the microphone would."""
+    endpointer.reset()
+    for start in range(0, len(samples), chunk_size):
+        if endpointer.feed(samples[start:start + chunk_size], rate):
+            # The decision is only known once the chunk that triggered it has arrived
+            return min(start + chunk_size, len(samples)) / rate
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate VAD endpoint delay on labelled WAV files")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories of them")
+    parser.add_argument("--chunk", type=int, default=1024, help="samples per block fed to the VAD")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--snr-db", type=float, default=9.0)
+    parser.add_argument("--onset", type=float, default=0.1)
+    parser.add_argument("--min-hangover", type=float, default=0.25)
+    parser.add_argument("--max-hangover", type=float, default=0.7)
+    parser.add_argument("--hangover-growth", type=float, default=0.1)
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="seconds before the labelled end that still count as on time")
+    args = parser.parse_args()
+
+    endpointer = Endpointer(
+        VoiceActivityDetector(snr_db=args.snr_db),
+        threshold=args.threshold,
+        onset_seconds=args.onset,
+        min_hangover=args.min_hangover,
+        max_hangover=args.max_hangover,
+        hangover_growth=args.hangover_growth,
+    )
+
+    delays = []
+    truncated = []
+    missed = []
+    for path in find_clips(args.paths):
+        label_path = os.path.splitext(path)[0] + ".json"
+        try:
+            with open(label_path, "r", encoding="utf-8") as f:
+                speech_end = float(json.load(f)["speech_end"])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Skipping {path}: no usable label ({e})")
+            continue
+        # A fresh detector per clip, so noise floors do not leak between recordings
+        endpointer.detector.noise_db = None
+        samples, rate = load_wav(path)
+        decided_at = run_clip(endpointer, samples, rate, args.chunk)
+        if decided_at is None:
+            missed.append(path)
+        elif decided_at < speech_end - args.tolerance:
+            truncated.append(path)
+        else:
+            delays.append(decided_at - speech_end)
+
+    total = len(delays) + len(truncated) + len(missed)
+    print(f"clips: {total}  endpointed: {len(delays)}  truncated: {len(truncated)}  missed: {len(missed)}")
+    if delays:
+        values = np.array(delays) * 1000
+        p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+        print(f"endpoint delay ms  mean {values.mean():.0f}  p50 {p50:.0f}  p90 {p90:.0f}  "
+              f"p95 {p95:.0f}  p99 {p99:.0f}  max {values.max():.0f}")
+    for path in truncated:
+        print(f"  truncated: {path}")
+    for path in missed:
+        print(f"  missed: {path}")
+
+
+if __name__ == "__main__":
+    main()
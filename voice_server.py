@@ -0,0 +1,306 @@
+# voice_server.py
+# Headless multi-session server: the voice pipeline over WebSocket
+#
+#   python voice_server.py --port 8765 [--max-sessions 50] [--speculate]
+#
+# Protocol, one WebSocket per conversation:
+#   client -> server  text   {"type": "hello", "sample_rate": 16000}  (first message)
+#                     binary 16-bit mono PCM from the client's microphone
+#                     text   {"type": "text", "text": "..."}  typed turn, skips ASR
+#                     text   {"type": "expect", "transcript": "..."}  (--fake-asr only)
+#   server -> client  text   {"type": "ready", "session": ..., "output_sample_rate": 22050}
+#                     text   transcript / message / delta / response / thinking /
+#                            listening events, and audio_start / audio_end /
+#                            audio_stop around speech
+#                     binary 16-bit mono PCM at output_sample_rate
+import argparse
+import asyncio
+import audioop
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+try:
+    import websockets
+except ImportError:  # Optional: only server mode needs it
+    websockets = None
+
+from asr_backends import FakeBackend, HedgedRecognizer
+from assistant import CACHE_DIR, SimpleVoiceAssistant
+from audio_player import PlaybackStats
+from headless import HeadlessSignalEmitter
+from http_pool import ELEVENLABS_BASE_URL, OPENAI_BASE_URL, get_shared_pool
+from mic_stream import BufferedMicrophone
+from response_cache import ResponseCache
+from tts_cache import AudioCache
+
+
+class StreamMicrophone(BufferedMicrophone):
+    """A BufferedMicrophone fed with PCM received from a client instead of a device."""
+
+    def __init__(self, recognizer, sample_rate=16000, chunk_size=1024):
+        self._input = queue.Queue()
+        self._pending = bytearray()
+        self._setup(recognizer, sample_rate, 2, chunk_size, buffer_seconds=30.0, warmup_seconds=0.5)
+
+    def feed(self, data):
+        """Queue client audio; safe to call from any thread."""
+        self._input.put(data)
+
+    def _open_device(self):
+        self._pending = bytearray()
+
+    def _read_device(self):
+        size = self.CHUNK * self.SAMPLE_WIDTH
+        while len(self._pending) < size:
+            try:
+                self._pending += self._input.get(timeout=0.1)
+            except queue.Empty:
+                if not self._running:
+                    return bytes(size)
+        chunk = bytes(self._pending[:size])
+        del self._pending[:size]
+        return chunk
+
+    def _close_device(self):
+        pass
+
+
+class WebSocketSink:
+    """
+    Stands in for StreamingAudioPlayer, sending speech to the client.
+
+    Audio is paced at real time with lead_seconds of read-ahead, so play()
+    returns about when the client finishes playing it; that keeps the
+    assistant's speaking state, and with it barge-in, in step with what
+    the user hears.
+    """
+
+    def __init__(self, session, sample_rate=22050, lead_seconds=0.5):
+        self.session = session
+        self.sample_rate = sample_rate
+        self.frame_bytes = 2
+        self.block_seconds = 0.0
+        self.lead_seconds = lead_seconds
+        self.output_level = 0
+        self._stopped = threading.Event()
+
+    def open(self):
+        pass
+
+    def play(self, chunks):
+        self._stopped.clear()
+        stats = PlaybackStats(time.perf_counter())
+        bytes_per_second = self.sample_rate * self.frame_bytes
+        for chunk in chunks:
+            if self._stopped.is_set():
+                break
+            if stats.first_sample_at is None:
+                stats.first_sample_at = time.perf_counter()
+                self.session.send_event("audio_start", sample_rate=self.sample_rate)
+            self.session.send_audio(chunk)
+            stats.bytes_played += len(chunk)
+            self.output_level = audioop.rms(chunk, self.frame_bytes) if len(chunk) >= self.frame_bytes else 0
+            ahead = stats.bytes_played / bytes_per_second - (time.perf_counter() - stats.first_sample_at)
+            if ahead > self.lead_seconds:
+                self._stopped.wait(ahead - self.lead_seconds)
+        if stats.first_sample_at is not None and not self._stopped.is_set():
+            remaining = stats.bytes_played / bytes_per_second - (time.perf_counter() - stats.first_sample_at)
+            self._stopped.wait(max(0.0, remaining))
+            self.session.send_event("audio_end")
+        self.output_level = 0
+        stats.finished_at = time.perf_counter()
+        return stats
+
+    def stop(self):
+        self._stopped.set()
+        self.session.send_event("audio_stop")
+        return 0
+
+
+class Session:
+    """
+    One client connection and the assistant serving it.
+
+    Everything conversational (turns, speaking state, microphone buffer,
+    traces) belongs to the session; the HTTP pool and the response and
+    audio caches are shared by all sessions in the process.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, websocket, loop, shared, sample_rate=16000, fake_asr=False, speculate=False):
+        self.id = next(Session._ids)
+        self.websocket = websocket
+        self.loop = loop
+        self.outbox = asyncio.Queue()
+        self.expected = ""
+        emitter = HeadlessSignalEmitter()
+        emitter.transcribe_signal.connect(lambda text: self.send_event("transcript", text=text))
+        emitter.update_text_signal.connect(
+            lambda text, is_user: self.send_event("message", role="user" if is_user else "aria", text=text))
+        emitter.response_delta_signal.connect(lambda text: self.send_event("delta", text=text))
+        emitter.response_ready_signal.connect(lambda text: self.send_event("response", text=text))
+        emitter.thinking_signal.connect(lambda value: self.send_event("thinking", value=value))
+        emitter.listening_signal.connect(lambda value: self.send_event("listening", value=value))
+
+        self.assistant = SimpleVoiceAssistant(
+            emitter,
+            response_cache=shared["response_cache"],
+            audio_cache=shared["audio_cache"],
+            player=WebSocketSink(self),
+        )
+        self.assistant.prewarm_audio_cache = False
+        self.assistant.speculative = speculate
+        if fake_asr:
+            # Load testing: the client says what it is about to say
+            self.assistant.asr = HedgedRecognizer([FakeBackend(lambda audio: self.expected, latency=0.3)])
+        self.microphone = StreamMicrophone(self.assistant.recognizer, sample_rate=sample_rate)
+        self.assistant.make_microphone = lambda recognizer: self.microphone
+        self._runner = None
+
+    def start(self):
+        self._runner = threading.Thread(target=self.assistant.run, daemon=True)
+        self._runner.start()
+
+    def close(self):
+        self.assistant.stop()
+        if self._runner is not None:
+            self._runner.join(timeout=5)
+        self.assistant.asr.shutdown()
+        self.assistant.speculator.shutdown()
+
+    # Called from pipeline threads; the writer task owns the socket
+
+    def send_event(self, kind, **fields):
+        fields["type"] = kind
+        self.loop.call_soon_threadsafe(self.outbox.put_nowait, json.dumps(fields))
+
+    def send_audio(self, data):
+        self.loop.call_soon_threadsafe(self.outbox.put_nowait, bytes(data))
+
+    def handle_text(self, message):
+        if not isinstance(message, dict):
+            return
+        kind = message.get("type")
+        if kind == "text" and message.get("text"):
+            self.assistant.scheduler.submit(text=message["text"].lower())
+        elif kind == "expect":
+            self.expected = message.get("transcript", "")
+
+    async def write_loop(self):
+        while True:
+            await self.websocket.send(await self.outbox.get())
+
+
+class VoiceServer:
+    """
+    Accepts WebSocket clients and gives each its own Session.
+
+    Args:
+        max_sessions (int): Connections beyond this are refused with 1013
+        fake_asr (bool): Use the client's "expect" hints instead of Google
+        speculate (bool): Turn on speculative LLM requests for every session
+    """
+
+    def __init__(self, max_sessions=50, fake_asr=False, speculate=False):
+        self.max_sessions = max_sessions
+        self.fake_asr = fake_asr
+        self.speculate = speculate
+        self.sessions = {}
+        # Slots taken, counting connections still saying hello or building their session
+        self.reserved = 0
+        # Shared by every session: one keep-alive pool and one set of caches.
+        # Each session streams an LLM reply and a TTS response at once.
+        self.http_pool = get_shared_pool(max_connections=max(20, 2 * max_sessions),
+                                         max_keepalive=max(10, 2 * max_sessions))
+        self.http_pool.register(OPENAI_BASE_URL)
+        self.http_pool.register(ELEVENLABS_BASE_URL)
+        self.shared = {
+            "response_cache": ResponseCache(path=os.path.join(CACHE_DIR, "responses.json")),
+            "audio_cache": AudioCache(os.path.join(CACHE_DIR, "tts")),
+        }
+
+    async def handle(self, websocket):
+        # Taken before the first await, so concurrent connections cannot all see a free slot
+        if self.reserved >= self.max_sessions:
+            await websocket.close(1013, "Too many sessions")
+            return
+        self.reserved += 1
+        try:
+            await self._serve_session(websocket)
+        finally:
+            self.reserved -= 1
+
+    async def _serve_session(self, websocket):
+        loop = asyncio.get_running_loop()
+        try:
+            hello = json.loads(await asyncio.wait_for(websocket.recv(), timeout=10))
+            if not isinstance(hello, dict):
+                raise TypeError("hello must be a JSON object")
+            sample_rate = int(hello.get("sample_rate", 16000))
+        except asyncio.TimeoutError:
+            await websocket.close(1002, "Expected a hello message")
+            return
+        except (ValueError, TypeError) as e:
+            await websocket.send(json.dumps({"type": "error", "message": f"Bad hello message: {e}"}))
+            await websocket.close(1002, "Expected a hello message")
+            return
+        # Building the SDK clients takes a moment; keep it off the event loop
+        session = await loop.run_in_executor(
+            None, lambda: Session(websocket, loop, self.shared, sample_rate, self.fake_asr, self.speculate))
+        self.sessions[session.id] = session
+        writer = asyncio.ensure_future(session.write_loop())
+        session.send_event("ready", session=session.id, output_sample_rate=session.assistant.player.sample_rate)
+        session.start()
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    session.microphone.feed(message)
+                else:
+                    try:
+                        session.handle_text(json.loads(message))
+                    except ValueError:
+                        pass
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.sessions.pop(session.id, None)
+            writer.cancel()
+            await loop.run_in_executor(None, session.close)
+
+    async def serve(self, host, port):
+        self.http_pool.preconnect()
+        self.http_pool.start_keepalive()
+        async with websockets.serve(self.handle, host, port, max_size=2 ** 20):
+            print(f"Voice server listening on ws://{host}:{port}", flush=True)
+            try:
+                await asyncio.Future()
+            finally:
+                self.shared["response_cache"].save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the voice pipeline over WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-sessions", type=int, default=50)
+    parser.add_argument("--fake-asr", action="store_true",
+                        help="recognize from the client's expect hints, for load testing")
+    parser.add_argument("--speculate", action="store_true")
+    args = parser.parse_args()
+    if websockets is None:
+        raise SystemExit("Server mode needs the websockets package: pip install websockets")
+
+    server = VoiceServer(args.max_sessions, args.fake_asr, args.speculate)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# ws_loadgen.py
+# Load generator for voice_server.py: how many concurrent sessions one core
+# sustains while turn latency stays under a target p95
+#
+# By default it starts the stand-in APIs in this process and voice_server.py
+# as a subprocess pinned to a single CPU, then ramps through --levels of
+# concurrent simulated users. Each user streams synthetic speech in real
+# time and measures end of speech -> first reply audio, which includes
+# endpointing, recognition, the LLM and TTS.
+#
+#   python ws_loadgen.py --levels 1 2 4 8 16 --target-p95-ms 2000
+#   python ws_loadgen.py --url ws://host:8765 --levels 8   (server run with --fake-asr)
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+try:
+    import websockets
+except ImportError:  # Optional: only server mode needs it
+    websockets = None
+
+from stand_in_server import FakeApiConfig, FakeApiHandler, StandInServer
+from trace_report import percentile
+
+SAMPLE_RATE = 16000
+
+
+def synth_utterance(seconds, rng):
+    """A voiced buzz with a syllable-like envelope and a little noise, as 16-bit PCM."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 110 + 40 * np.sin(2 * np.pi * rng.uniform(1.5, 3.0) * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = 0.12 * np.sign(np.sin(phase)) + 0.1 * np.sin(3 * phase)
+    envelope = 0.6 + 0.4 * np.abs(np.sin(np.pi * rng.uniform(3, 5) * t))
+    envelope *= np.clip(np.minimum(t, t[-1] - t) * 20, 0, 1)
+    signal = voice * envelope + rng.normal(0, 0.001, len(t))
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def silence(seconds, rng):
+    return (rng.normal(0, 0.001, int(seconds * SAMPLE_RATE)) * 32767).astype("<i2").tobytes()
+
+
+class SimulatedUser:
+    """One client: streams microphone audio in real time and times each reply."""
+
+    def __init__(self, url, user_id, turns, frame_seconds, turn_timeout, seed):
+        self.url = url
+        self.user_id = user_id
+        self.turns = turns
+        self.frame_bytes = int(frame_seconds * SAMPLE_RATE) * 2
+        self.frame_seconds = frame_seconds
+        self.turn_timeout = turn_timeout
+        self.rng = np.random.default_rng(seed)
+        self.latencies = []
+        self.failures = 0
+        self._audio = bytearray()
+        self._events = asyncio.Queue()
+
+    async def _send_audio(self, websocket):
+        # Like a real microphone: one frame per frame period, speech or not
+        next_at = time.perf_counter()
+        while True:
+            if len(self._audio) < self.frame_bytes:
+                self._audio += silence(1.0, self.rng)
+            frame = bytes(self._audio[:self.frame_bytes])
+            del self._audio[:self.frame_bytes]
+            await websocket.send(frame)
+            next_at += self.frame_seconds
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+    async def _receive(self, websocket):
+        async for message in websocket:
+            if isinstance(message, str):
+                await self._events.put(json.loads(message))
+
+    async def _wait_for(self, kind, timeout, value=None):
+        deadline = time.perf_counter() + timeout
+        while True:
+            event = await asyncio.wait_for(self._events.get(), max(0.01, deadline - time.perf_counter()))
+            if event["type"] == kind and (value is None or event.get("value") == value):
+                return event
+
+    async def run(self):
+        async with websockets.connect(self.url, max_size=2 ** 22) as websocket:
+            await websocket.send(json.dumps({"type": "hello", "sample_rate": SAMPLE_RATE}))
+            receiver = asyncio.ensure_future(self._receive(websocket))
+            sender = asyncio.ensure_future(self._send_audio(websocket))
+            try:
+                await self._wait_for("ready", self.turn_timeout)
+                # The session opens with a spoken greeting; listening resumes after each reply
+                await self._wait_for("audio_start", self.turn_timeout)
+                await self._wait_for("listening", self.turn_timeout, value=True)
+                for turn in range(self.turns):
+                    await self._turn(websocket, turn)
+            finally:
+                sender.cancel()
+                receiver.cancel()
+
+    async def _turn(self, websocket, turn):
+        # A unique question, so the shared response cache cannot answer it
+        transcript = f"user {self.user_id} turn {turn} question {self.rng.integers(1 << 30)}"
+        await websocket.send(json.dumps({"type": "expect", "transcript": transcript}))
+        while not self._events.empty():
+            self._events.get_nowait()
+        speech = synth_utterance(self.rng.uniform(0.8, 1.6), self.rng)
+        self._audio = bytearray(silence(0.2, self.rng)) + speech
+        # Speech ends once the sender has drained it
+        speech_end = time.perf_counter() + len(self._audio) / 2 / SAMPLE_RATE
+        try:
+            await self._wait_for("audio_start", self.turn_timeout + len(self._audio) / 2 / SAMPLE_RATE)
+            self.latencies.append(time.perf_counter() - speech_end)
+            await self._wait_for("listening", self.turn_timeout, value=True)
+        except asyncio.TimeoutError:
+            self.failures += 1
+        await asyncio.sleep(self.rng.uniform(0.5, 1.0))
+
+
+async def run_level(url, sessions, turns, frame_seconds, turn_timeout, seed):
+    users = [SimulatedUser(url, i, turns, frame_seconds, turn_timeout, seed + i) for i in range(sessions)]
+
+    async def run_user(user):
+        # Stagger arrivals so sessions do not speak in lockstep
+        await asyncio.sleep(random.Random(seed + user.user_id).uniform(0, 1.0))
+        try:
+            await user.run()
+        except (OSError, websockets.WebSocketException, asyncio.TimeoutError) as e:
+            print(f"user {user.user_id}: {e}", file=sys.stderr)
+            user.failures += turns - len(user.latencies)
+
+    await asyncio.gather(*(run_user(user) for user in users))
+    latencies = sorted(latency for user in users for latency in user.latencies)
+    return latencies, sum(user.failures for user in users)
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time of a process, from /proc."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(api_url, port, cpu, max_sessions, verbose=False):
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_BASE_URL": api_url + "/v1",
+        "ELEVENLABS_BASE_URL": api_url,
+        "OPENAI_API_KEY": "stand-in",
+        "ELEVENLABS_API_KEY": "stand-in",
+        "ARIA_CACHE_DIR": tempfile.mkdtemp(prefix="aria-loadgen-"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "voice_server.py"),
+               "--port", str(port), "--fake-asr", "--max-sessions", str(max_sessions)]
+    pin = None
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        def pin():
+            os.sched_setaffinity(0, {cpu})
+    proc = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True, preexec_fn=pin)
+    for line in proc.stdout:
+        if "listening" in line:
+            break
+    else:
+        raise RuntimeError("voice_server.py exited before it started listening")
+
+    def drain():
+        # Keep the pipe from filling up and blocking the server's prints
+        for line in proc.stdout:
+            if verbose:
+                print(f"server: {line}", end="", file=sys.stderr)
+
+    threading.Thread(target=drain, daemon=True).start()
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for voice_server.py")
+    parser.add_argument("--url", help="existing server (run with --fake-asr); default starts one")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--turns", type=int, default=5, help="turns per simulated user")
+    parser.add_argument("--target-p95-ms", type=float, default=2000.0)
+    parser.add_argument("--cpu", type=int, default=0, help="CPU to pin the server to, -1 for no pinning")
+    parser.add_argument("--frame-ms", type=float, default=40.0, help="client audio frame size")
+    parser.add_argument("--turn-timeout", type=float, default=15.0)
+    parser.add_argument("--first-token", type=float, default=0.3)
+    parser.add_argument("--tts-first-byte", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="show the server's output")
+    args = parser.parse_args()
+    if websockets is None:
+        raise SystemExit("The load generator needs the websockets package: pip install websockets")
+
+    api = server = None
+    url = args.url
+    if url is None:
+        config = FakeApiConfig(first_token_delay=args.first_token, tts_first_byte_delay=args.tts_first_byte,
+                               seed=args.seed)
+        api = StandInServer(FakeApiHandler, config=config).start()
+        port = free_port()
+        cpu = None if args.cpu < 0 else args.cpu
+        server = start_server(api.url, port, cpu, max(args.levels), args.verbose)
+        url = f"ws://127.0.0.1:{port}"
+        if cpu is not None and hasattr(os, "sched_setaffinity") and len(os.sched_getaffinity(0)) > 1:
+            # Keep the load generator and stand-in APIs off the server's core
+            os.sched_setaffinity(0, os.sched_getaffinity(0) - {cpu})
+
+    results = []
+    sustained = 0
+    try:
+        for sessions in args.levels:
+            cpu_before = cpu_seconds(server.pid) if server else None
+            started = time.perf_counter()
+            latencies, failures = asyncio.run(
+                run_level(url, sessions, args.turns, args.frame_ms / 1000.0, args.turn_timeout, args.seed))
+            elapsed = time.perf_counter() - started
+            cpu_after = cpu_seconds(server.pid) if server else None
+            p50 = percentile(latencies, 50)
+            p95 = percentile(latencies, 95)
+            result = {
+                "sessions": sessions,
+                "turns": len(latencies),
+                "failures": failures,
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "server_cpu": round((cpu_after - cpu_before) / elapsed, 2)
+                if cpu_before is not None and cpu_after is not None else None,
+            }
+            results.append(result)
+            if not args.json:
+                print(f"{sessions:>4} sessions: {result['turns']} turns, {failures} failed, "
+                      f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                      f"server CPU {result['server_cpu']}", flush=True)
+            if failures or p95 is None or p95 * 1000 > args.target_p95_ms:
+                break
+            sustained = sessions
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if api is not None:
+            api.stop()
+
+    if args.json:
+        print(json.dumps({"target_p95_ms": args.target_p95_ms, "sustained_sessions": sustained,
+                          "levels": results}, indent=2))
+    else:
+        where = "one core" if server is not None and args.cpu >= 0 else "this server"
+        print(f"{sustained} concurrent sessions sustained on {where} at p95 <= {args.target_p95_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()